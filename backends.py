@@ -0,0 +1,45 @@
+import importlib
+import logging
+import time
+from types import ModuleType
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Тяжёлые зависимости загружаются при первом обращении, а не при импорте main.py
+BACKENDS = {
+    'aiohttp': 'aiohttp',
+    'httpx': 'httpx',
+    'feedparser': 'feedparser',
+    'chardet': 'chardet',
+    'bs4': 'bs4',
+    'soupsieve': 'soupsieve',
+    'playwright': 'playwright.async_api',
+    'aiogram': 'aiogram',
+    'deep_translator': 'deep_translator',
+    'langdetect': 'langdetect',
+    'cloudscraper': 'cloudscraper',
+}
+
+IMPORT_TIMES: Dict[str, float] = {}
+_loaded: Dict[str, ModuleType] = {}
+
+
+def backend(name: str) -> ModuleType:
+    """Возвращает модуль зависимости, импортируя его при первом вызове"""
+    module = _loaded.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(BACKENDS[name])
+        IMPORT_TIMES[name] = time.perf_counter() - started
+        _loaded[name] = module
+        logger.debug(f"⏱ Загружен модуль {name} за {IMPORT_TIMES[name] * 1000:.0f} мс")
+    return module
+
+
+def import_report() -> str:
+    if not IMPORT_TIMES:
+        return "⏱ Тяжёлые модули не загружались"
+    total = sum(IMPORT_TIMES.values())
+    parts = [f"{name} {seconds * 1000:.0f} мс" for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1])]
+    return f"⏱ Загрузка модулей: {total * 1000:.0f} мс ({', '.join(parts)})"
@@ -0,0 +1,174 @@
+"""Бенчмарки отдельных этапов конвейера без сети и Telegram.
+
+    python bench.py langid [--samples файл.jsonl] [--repeat N]
+    python bench.py strip [--samples файл.jsonl] [--repeat N]
+
+Файл образцов — JSON Lines с полями lang, title, description
+(для strip достаточно description с HTML, как в ленте).
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from backends import backend
+
+LANGID_SAMPLES = [
+    {"lang": "ru", "title": "НЛМК увеличил выплавку стали на 5% в третьем квартале",
+     "description": "Компания нарастила производство проката благодаря модернизации доменной печи №7."},
+    {"lang": "ru", "title": "Северсталь запустила новую линию по производству оцинкованного проката",
+     "description": "Инвестиции в проект составили 12 млрд рублей, мощность линии — 450 тыс. тонн в год."},
+    {"lang": "ru", "title": "ММК: цены на горячекатаный лист снизились",
+     "description": "Снижение связано с сезонным падением спроса в строительстве."},
+    {"lang": "en", "title": "Global crude steel production rises 2.1% in September",
+     "description": "World crude steel production for the 71 countries reporting to worldsteel was 151.1 million tonnes."},
+    {"lang": "en", "title": "Iron ore prices slip as Chinese steel mills curb output",
+     "description": "Benchmark iron ore futures fell for a third session amid weaker demand from blast furnace operators."},
+    {"lang": "en", "title": "Green steel: hydrogen-based DRI plant reaches final investment decision",
+     "description": "The project aims to cut CO2 emissions from steelmaking by up to 95% compared with the blast furnace route."},
+    {"lang": "en", "title": "Mining company reports record copper output",
+     "description": "Production at the flagship mine rose on higher ore grades and improved recoveries."},
+    {"lang": "de", "title": "Thyssenkrupp Steel plant Stellenabbau in Duisburg",
+     "description": "Der Stahlkonzern will die Produktionskapazitäten bis 2030 deutlich reduzieren und Kosten senken."},
+    {"lang": "de", "title": "Stahlpreise steigen wegen höherer Energiekosten",
+     "description": "Die europäischen Hersteller geben die gestiegenen Kosten für Strom und Gas an die Kunden weiter."},
+    {"lang": "fr", "title": "ArcelorMittal annonce un investissement dans l'acier décarboné",
+     "description": "Le groupe sidérurgique prévoit de remplacer deux hauts fourneaux par des fours électriques à Dunkerque."},
+    {"lang": "es", "title": "La producción de acero en México cae un 4% interanual",
+     "description": "La industria siderúrgica atribuye la caída a la menor demanda del sector automotriz y de la construcción."},
+    {"lang": "pt", "title": "Vale eleva produção de minério de ferro no trimestre",
+     "description": "A mineradora informou que a produção atingiu 90 milhões de toneladas, acima das expectativas do mercado."},
+    {"lang": "zh-CN", "title": "宝武集团发布三季度钢铁产量数据",
+     "description": "中国宝武钢铁集团第三季度粗钢产量同比增长百分之三，绿色低碳冶金项目进展顺利。"},
+    {"lang": "ja", "title": "日本製鉄、高炉から電炉への転換を発表",
+     "description": "日本製鉄は脱炭素化に向けて、製鉄所の高炉を電気炉に置き換える計画を明らかにした。"},
+    {"lang": "ko", "title": "포스코, 수소환원제철 실증 설비 착공",
+     "description": "포스코는 탄소 배출을 줄이기 위해 포항제철소에 수소환원제철 실증 설비를 건설한다고 밝혔다."},
+]
+
+
+# Описания в том виде, в каком их отдают WordPress, Bitrix и новостные агрегаторы
+STRIP_SAMPLES = [
+    {"description": '<p><img width="300" height="200" src="https://example.com/wp-content/uploads/2024/10/steel-300x200.jpg" '
+                    'class="attachment-medium size-medium wp-post-image" alt="" decoding="async" loading="lazy" /></p>'
+                    '<p>Компания нарастила производство проката на&nbsp;7% благодаря модернизации доменной печи&nbsp;№7 '
+                    '&laquo;Россиянка&raquo;.</p><p>Запись <a rel="nofollow" href="https://example.com/news/1">НЛМК увеличил выплавку</a> '
+                    'впервые появилась <a rel="nofollow" href="https://example.com">Металлоснабжение</a>.</p>'},
+    {"description": '<div class="field-item"><p>World crude steel production for the 71 countries reporting to '
+                    '<strong>worldsteel</strong> was 151.1 million tonnes (Mt) in September&nbsp;2024, a 4.7% decrease '
+                    'compared to September 2023.</p><ul><li>China produced 77.1 Mt</li><li>India produced 11.7 Mt</li>'
+                    '<li>Japan produced 6.6 Mt</li></ul></div>'},
+    {"description": 'Снижение связано с сезонным падением спроса в строительстве &mdash; аналитики ждут '
+                    'восстановления цен к весне.'},
+    {"description": '<p>Der Stahlkonzern will die Produktionskapazitäten bis 2030 deutlich reduzieren.</p>'
+                    '<!-- more --><script type="text/javascript">window.dataLayer.push({"event": "view"});</script>'
+                    '<p>Mehr dazu <a href="https://example.com/artikel">hier</a> &#8230;</p>'},
+    {"description": '<table><tr><td>Арматура А500С</td><td>52 300 руб./т</td></tr><tr><td>Лист г/к</td>'
+                    '<td>61 800 руб./т</td></tr></table><br/><em>Цены указаны с НДС &amp; доставкой</em>'},
+]
+
+
+def load_samples(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def bench_langid(samples: List[Dict], repeat: int):
+    import langid
+
+    langdetect = backend('langdetect')
+
+    # Прежнее поведение: два вызова langdetect на запись (заголовок и описание), без seed
+    def old_detect(text: str) -> str:
+        try:
+            return langdetect.detect(text)
+        except langdetect.LangDetectException:
+            return 'unknown'
+
+    old_detect(samples[0]['title'])  # прогрев профилей langdetect
+    started = time.perf_counter()
+    old_correct = 0
+    for _ in range(repeat):
+        for sample in samples:
+            for text in (sample['title'], sample['description']):
+                old_correct += old_detect(text).lower() == sample['lang'].lower()
+    old_elapsed = time.perf_counter() - started
+    old_calls = repeat * len(samples) * 2
+    # Без seed один и тот же текст может получить разный язык
+    old_unstable = sum(
+        old_detect(text) != old_detect(text)
+        for sample in samples for text in (sample['title'], sample['description'])
+    )
+
+    langid._cache.clear()
+    started = time.perf_counter()
+    new_correct = sum(langid.detect_language(f"{s['title']} {s['description']}") == s['lang'] for s in samples)
+    new_cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for sample in samples:
+            langid.detect_language(f"{sample['title']} {sample['description']}")
+    new_warm = time.perf_counter() - started
+
+    print(f"Записей: {len(samples)}, повторов: {repeat}")
+    print(f"Было:  точность {old_correct / old_calls:.0%} по строкам, "
+          f"{old_elapsed / (repeat * len(samples)) * 1000:.2f} мс на запись, "
+          f"нестабильных ответов {old_unstable}")
+    print(f"Стало: точность {new_correct / len(samples):.0%} по записям, "
+          f"{new_cold / len(samples) * 1000:.2f} мс на запись (холодный кэш), "
+          f"{new_warm / (repeat * len(samples)) * 1000:.3f} мс (тёплый кэш)")
+
+
+def bench_strip(samples: List[Dict], repeat: int):
+    from textutil import html_to_text
+
+    BeautifulSoup = backend('bs4').BeautifulSoup
+    descriptions = [sample['description'] for sample in samples]
+
+    # Прежнее поведение: BeautifulSoup на каждую запись в parse_rss
+    def old_strip(markup: str) -> str:
+        return BeautifulSoup(markup, 'html.parser').get_text(separator=' ', strip=True)
+
+    def timed(strip) -> float:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for markup in descriptions:
+                strip(markup)
+        return (time.perf_counter() - started) / (repeat * len(descriptions))
+
+    old_per_item = timed(old_strip)
+    new_per_item = timed(html_to_text)
+    # Сравниваем результат без учёта пробелов между словами
+    mismatches = sum(old_strip(markup).split() != html_to_text(markup).split() for markup in descriptions)
+
+    print(f"Описаний: {len(descriptions)}, повторов: {repeat}")
+    print(f"Было (BeautifulSoup): {old_per_item * 1_000_000:.1f} мкс на описание")
+    print(f"Стало (html_to_text): {new_per_item * 1_000_000:.1f} мкс на описание, "
+          f"быстрее в {old_per_item / new_per_item:.1f} раза")
+    print(f"Расхождений в тексте: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки конвейера новостей")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    langid_parser = subparsers.add_parser('langid', help="определение языка: было/стало")
+    langid_parser.add_argument('--samples', help="JSON Lines с полями lang, title, description")
+    langid_parser.add_argument('--repeat', type=int, default=5)
+
+    strip_parser = subparsers.add_parser('strip', help="очистка HTML в описаниях: было/стало")
+    strip_parser.add_argument('--samples', help="JSON Lines с полем description")
+    strip_parser.add_argument('--repeat', type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == 'langid':
+        samples = load_samples(args.samples) if args.samples else LANGID_SAMPLES
+        bench_langid(samples, args.repeat)
+    elif args.command == 'strip':
+        samples = load_samples(args.samples) if args.samples else STRIP_SAMPLES
+        bench_strip(samples, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
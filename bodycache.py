@@ -0,0 +1,59 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple, Union
+
+from items import NewsItem
+
+# Поля новости в кэше: заголовок, описание, ссылка, источник, время публикации
+ItemFields = Tuple[str, str, str, str, Optional[float]]
+
+
+def body_digest(body: Union[bytes, str]) -> str:
+    if isinstance(body, str):
+        body = body.encode('utf-8', errors='replace')
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class BodyCache:
+    """Хеш ответа каждого источника и новости, полученные из него в прошлом цикле
+
+    Если сайт отдал тот же документ, разбор и оценка новостей пропускаются.
+    Хранятся поля новостей, а не сами объекты: этапы цикла (перевод, очистка,
+    оформление) меняют NewsItem на месте, а при попадании нужны исходные записи;
+    оценка пересчитывается заново, так как зависит от свежести.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, List[ItemFields]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, name: str, digest: str) -> Optional[List[NewsItem]]:
+        entry = self._entries.get(name)
+        if entry and entry[0] == digest:
+            self.hits += 1
+            return [NewsItem(*fields) for fields in entry[1]]
+        self.misses += 1
+        return None
+
+    def has(self, name: str) -> bool:
+        return name in self._entries
+
+    def latest(self, name: str) -> Optional[List[NewsItem]]:
+        """Новости последнего разобранного ответа источника, без сверки хеша (для ответа 304)"""
+        entry = self._entries.get(name)
+        return [NewsItem(*fields) for fields in entry[1]] if entry else None
+
+    def store(self, name: str, digest: str, items: List[NewsItem]):
+        self._entries[name] = (digest, [
+            (item.title, item.description, item.link, item.source, item.published) for item in items
+        ])
+
+    def summary(self) -> str:
+        return f"♻️ Ответы без изменений: {self.hits} из {self.hits + self.misses}"
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+body_cache = BodyCache()
@@ -0,0 +1,76 @@
+import logging
+import time
+from typing import Dict
+
+from config import (
+    SOURCE_HEALTH_FILE,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_COOLOFF,
+    BREAKER_MAX_COOLOFF,
+)
+from statestore import state_store
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreakers:
+    """Автоматы по источникам: хронически падающие сайты пропускаются и изредка проверяются"""
+
+    def __init__(self, legacy_path: str):
+        self.states: Dict[str, Dict] = state_store.load('health', legacy_path)
+
+    def _get(self, name: str) -> Dict:
+        state = self.states.get(name)
+        if state is None:
+            state = {'state': CLOSED, 'failures': 0, 'cooloff': BREAKER_COOLOFF, 'opened_until': 0}
+            self.states[name] = state
+        return state
+
+    def allow(self, name: str) -> bool:
+        """Можно ли опрашивать источник в этом цикле"""
+        state = self._get(name)
+        if state['state'] == OPEN:
+            if time.time() < state['opened_until']:
+                return False
+            # Остывание закончилось — пробуем один раз
+            state['state'] = HALF_OPEN
+            logger.info(f"🔌 {name}: пробный запрос после паузы")
+        return True
+
+    def record_success(self, name: str):
+        state = self._get(name)
+        if state['state'] != CLOSED:
+            logger.info(f"🔌 {name}: источник снова доступен")
+        state.update(state=CLOSED, failures=0, cooloff=BREAKER_COOLOFF, opened_until=0)
+
+    def record_failure(self, name: str):
+        state = self._get(name)
+        state['failures'] += 1
+        if state['state'] == HALF_OPEN:
+            # Неудачная проверка — удваиваем паузу
+            state['cooloff'] = min(state['cooloff'] * 2, BREAKER_MAX_COOLOFF)
+        elif state['failures'] < BREAKER_FAILURE_THRESHOLD:
+            return
+        state['state'] = OPEN
+        state['opened_until'] = time.time() + state['cooloff']
+        logger.warning(f"🔌 {name}: отключён на {state['cooloff'] // 60} мин после {state['failures']} ошибок подряд")
+
+    def summary(self) -> str:
+        counts = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        for state in self.states.values():
+            counts[state['state']] += 1
+        opened = [name for name, state in self.states.items() if state['state'] == OPEN]
+        text = f"🔌 Источники: работают {counts[CLOSED]}, отключены {counts[OPEN]}, на проверке {counts[HALF_OPEN]}"
+        if opened:
+            text += f" (отключены: {', '.join(opened)})"
+        return text
+
+    def save(self):
+        state_store.put('health', self.states)
+
+
+circuit_breakers = CircuitBreakers(SOURCE_HEALTH_FILE)
@@ -0,0 +1,58 @@
+"""Запуск распределённого режима на одной машине: N сборщиков и один публикатор.
+
+    python cluster.py --collectors 4
+
+Каждый сборщик — отдельный процесс main.py с BOT_ROLE=collector и своим SHARD_ID;
+хосты источников делятся между ними согласованным хешированием. Публикатор
+(BOT_ROLE=publisher) забирает новости из общей очереди OUTBOX_DB, хранит список
+опубликованных ссылок и один отправляет сообщения. Сборщики на других машинах
+запускаются так же через переменные окружения, но очередь SQLite должна быть
+доступна им как локальный файл.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+def spawn(role: str, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, 'main.py'], env={**os.environ, 'BOT_ROLE': role, **env})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск сборщиков и публикатора на одной машине")
+    parser.add_argument('--collectors', type=int, default=os.cpu_count() or 2, help="число процессов-сборщиков")
+    parser.add_argument('--prefix', default='shard', help="префикс имён шардов")
+    args = parser.parse_args()
+
+    shards = [f"{args.prefix}{i + 1}" for i in range(max(1, args.collectors))]
+    processes: List[subprocess.Popen] = [spawn('publisher', {})]
+    processes += [spawn('collector', {'SHARDS': ','.join(shards), 'SHARD_ID': shard}) for shard in shards]
+    print(f"Запущены публикатор и сборщики: {', '.join(shards)}")
+
+    exit_code = 0
+    try:
+        # Процессы работают бесконечно: выход любого из них останавливает всю группу
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        exit_code = next(process.returncode for process in processes if process.returncode is not None)
+        print(f"Один из процессов завершился с кодом {exit_code}, останавливаем остальные")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+        for process in processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import calendar
+from typing import Callable, Dict, List, Optional, Set
+
+from config import FEED_CURSORS_FILE
+from statestore import state_store
+
+
+def entry_key(entry) -> str:
+    return entry.get('id') or entry.get('link') or entry.get('title', '')
+
+
+def entry_timestamp(entry) -> Optional[int]:
+    published = entry.get('published_parsed') or entry.get('updated_parsed')
+    return calendar.timegm(published) if published else None
+
+
+class FeedCursors:
+    """Обработанные записи каждой ленты (по guid), чтобы не разбирать их повторно
+
+    Запись считается обработанной, когда фильтр её отбросил или новость опубликована.
+    Отобранные, но не опубликованные записи (ошибка отправки, не попали в лучшие
+    за цикл) остаются в ожидании и читаются снова в следующем цикле.
+    """
+
+    def __init__(self, legacy_path: str):
+        self.cursors: Dict[str, Dict] = state_store.load('cursors', legacy_path)
+        # Ожидающие публикации записи: источник -> {guid: хеш ссылки}
+        self.pending: Dict[str, Dict[str, str]] = {}
+
+    def get(self, name: str) -> Set[str]:
+        cursor = self.cursors.get(name) or {}
+        if 'seen' not in cursor and cursor.get('id'):
+            # Прежний формат хранил только самую свежую запись
+            return {cursor['id']}
+        return set(cursor.get('seen', []))
+
+    @staticmethod
+    def is_seen(seen: Set[str], entry) -> bool:
+        """Запись уже обработана в прошлых циклах; порядок записей в ленте не важен"""
+        return entry_key(entry) in seen
+
+    def track(self, name: str, present: List[str], parsed: List[str], pending: Dict[str, str]):
+        """Запоминает итог разбора ленты
+
+        present — guid всех записей ленты, parsed — разобранных в этом цикле,
+        pending — отобранных фильтром {guid: хеш ссылки}. Остальные разобранные
+        записи отброшены фильтром и больше не читаются. Храним только guid записей,
+        которые ещё есть в ленте, поэтому список не растёт.
+        """
+        seen = self.get(name)
+        seen.update(key for key in parsed if key not in pending)
+        self.cursors[name] = {'seen': [key for key in present if key in seen]}
+        self.pending[name] = dict(pending)
+
+    def settle(self, is_published: Callable[[str], bool]):
+        """Переносит опубликованные записи из ожидания в обработанные"""
+        for name, pending in self.pending.items():
+            done = [key for key, url_hash in pending.items() if is_published(url_hash)]
+            if not done:
+                continue
+            cursor = self.cursors.setdefault(name, {})
+            cursor['seen'] = list(self.get(name) | set(done))
+            cursor.pop('id', None)
+            cursor.pop('published', None)
+            for key in done:
+                del pending[key]
+
+    def save(self):
+        state_store.put('cursors', self.cursors)
+
+
+feed_cursors = FeedCursors(FEED_CURSORS_FILE)
@@ -1,3 +1,8 @@
+import re
+from typing import Optional
+
+from config import FRESHNESS_HALF_LIFE
+
 KEYWORDS = [
     "металлург",
     "гок",
@@ -65,21 +70,79 @@ EXCLUDE_KEYWORDS = [
     "белый дом",
 ]
 
-def is_relevant(text):
+# Вес ключевого слова в оценке: точные отраслевые термины важнее общих слов
+KEYWORD_WEIGHTS = {keyword: 1.0 for keyword in KEYWORDS}
+KEYWORD_WEIGHTS.update({
+    "металл": 0.5,
+    "mining": 0.5,
+    "декарбонизац": 2.0,
+    "decarboniz": 2.0,
+    "зелён сталь": 2.0,
+    "зелен сталь": 2.0,
+    "green steel": 2.0,
+    "доменн": 2.0,
+    "blast furnace": 2.0,
+    "электросталь": 2.0,
+    "ферросплав": 2.0,
+    "нлмк": 1.5,
+    "северсталь": 1.5,
+    "ммк": 1.5,
+    "евраз": 1.5,
+    "металлоинвест": 1.5,
+})
+
+# Слово в заголовке весит больше, чем в описании
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+# Минимальная оценка новостей источников с always_include, даже без ключевых слов
+ALWAYS_INCLUDE_SCORE = 1.0
+# Множитель свежести записи без даты (обычно HTML): как у записи возрастом в половину
+# FRESHNESS_HALF_LIFE, а не как у только что вышедшей, чтобы такие записи не вытесняли свежие из RSS
+UNDATED_FRESHNESS = 0.5 ** 0.5
+
+
+# Ключевые слова ищем подстрокой: «металлург» должен находиться и в «электрометаллургический».
+# Исключения — с начала слова, чтобы «экспорт» не отсеивался из-за «спорт»
+EXCLUDE_RE = re.compile(r"\b(?:" + '|'.join(re.escape(word) for word in sorted(EXCLUDE_KEYWORDS, key=len, reverse=True)) + ")")
+
+
+def is_excluded(text):
+    return bool(text) and EXCLUDE_RE.search(text.lower()) is not None
+
+
+def keyword_score(text):
+    """Сумма весов ключевых слов, найденных в тексте; повтор одного слова не учитывается"""
     if not text:
-        return False
-    
+        return 0.0
     text_lower = text.lower()
-    
-    for exclude in EXCLUDE_KEYWORDS:
-        if exclude in text_lower:
-            return False
-    
-    for keyword in KEYWORDS:
-        if keyword in text_lower:
-            return True
-    
-    return False
+    return sum(weight for keyword, weight in KEYWORD_WEIGHTS.items() if keyword in text_lower)
+
+
+def is_relevant(text):
+    if not text or is_excluded(text):
+        return False
+    return keyword_score(text) > 0
+
+
+def freshness(published: Optional[float], now: Optional[float], half_life: float = FRESHNESS_HALF_LIFE) -> float:
+    """Множитель свежести: 1 для новой записи, 0.5 через half_life часов; без даты — UNDATED_FRESHNESS"""
+    if now is None or half_life <= 0:
+        return 1.0
+    if published is None:
+        return UNDATED_FRESHNESS
+    age_hours = max(0.0, now - published) / 3600
+    return 0.5 ** (age_hours / half_life)
+
+
+def relevance_score(title, description, priority: float = 1.0, published: Optional[float] = None,
+                    now: Optional[float] = None, always_include: bool = False) -> float:
+    """Оценка новости для отбора лучших; 0 — новость нерелевантна"""
+    if not always_include and is_excluded(f"{title} {description}"):
+        return 0.0
+    score = TITLE_WEIGHT * keyword_score(title) + DESCRIPTION_WEIGHT * keyword_score(description)
+    if always_include:
+        score = max(score, ALWAYS_INCLUDE_SCORE)
+    return score * priority * freshness(published, now)
 
 def get_hashtags(text):
     hashtags = []
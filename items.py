@@ -0,0 +1,42 @@
+import hashlib
+from typing import Dict, List, Optional
+
+
+def get_url_hash(url: str) -> str:
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+class NewsItem:
+    """Новость на всех этапах конвейера; __slots__ экономят память и ускоряют доступ к полям"""
+
+    __slots__ = ('title', 'description', 'link', 'source', 'url_hash', 'published', 'score', 'lang', 'hashtags', 'text')
+
+    def __init__(self, title: str, description: str, link: str, source: str, published: Optional[float] = None):
+        self.title = title.strip()
+        self.description = description
+        self.link = link.strip()
+        self.source = source
+        self.url_hash = get_url_hash(self.link)
+        # Время публикации (Unix) и оценка релевантности для отбора лучших новостей цикла
+        self.published = published
+        self.score = 0.0
+        self.lang: Optional[str] = None
+        self.hashtags: List[str] = []
+        # Готовый текст поста, форматируется один раз
+        self.text = ''
+
+    def to_dict(self) -> Dict:
+        """Поля, нужные публикатору: сборщик передаёт новость до перевода и оформления"""
+        return {
+            'title': self.title, 'description': self.description, 'link': self.link,
+            'source': self.source, 'published': self.published, 'score': self.score,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'NewsItem':
+        item = cls(data['title'], data.get('description', ''), data['link'], data['source'], data.get('published'))
+        item.score = data.get('score', 0.0)
+        return item
+
+    def __repr__(self) -> str:
+        return f"NewsItem({self.source!r}, {self.title[:40]!r}, {self.link!r})"
@@ -0,0 +1,72 @@
+import hashlib
+import re
+from collections import OrderedDict
+
+from backends import backend
+from config import LANGID_CACHE_SIZE
+
+# Доля букв алфавита, при которой язык определяется по письменности без модели
+SCRIPT_RATIO = 0.5
+
+_CYRILLIC = re.compile('[\u0400-\u04ff]')
+_HANGUL = re.compile('[\uac00-\ud7af\u1100-\u11ff]')
+_KANA = re.compile('[\u3040-\u30ff]')
+_HAN = re.compile('[\u4e00-\u9fff]')
+_LETTERS = re.compile(r'[^\W\d_]')
+
+LANG_CODE_FIXES = {'zh-cn': 'zh-CN', 'zh-tw': 'zh-TW'}
+
+_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_seeded = False
+
+
+def detect_by_script(text: str) -> str:
+    """Определяет язык по письменности; пустая строка — нужна модель"""
+    letters = len(_LETTERS.findall(text))
+    if not letters:
+        return 'unknown'
+    # Кириллица в наших источниках — русский; украинский и др. переводить не нужно
+    if len(_CYRILLIC.findall(text)) / letters >= SCRIPT_RATIO:
+        return 'ru'
+    if _HANGUL.search(text):
+        return 'ko'
+    if _KANA.search(text):
+        return 'ja'
+    if len(_HAN.findall(text)) / letters >= SCRIPT_RATIO:
+        return 'zh-CN'
+    return ''
+
+
+def _detect_with_model(text: str) -> str:
+    global _seeded
+    langdetect = backend('langdetect')
+    if not _seeded:
+        # Без seed langdetect выдаёт разный результат для одного и того же текста
+        langdetect.DetectorFactory.seed = 0
+        _seeded = True
+    try:
+        lang = langdetect.detect(text)
+    except langdetect.LangDetectException:
+        return 'unknown'
+    # GoogleTranslator ожидает коды китайского в виде zh-CN / zh-TW
+    return LANG_CODE_FIXES.get(lang, lang)
+
+
+def detect_language(text: str) -> str:
+    if not text or len(text.strip()) < 3:
+        return 'unknown'
+    lang = detect_by_script(text)
+    if lang:
+        return lang
+
+    key = hashlib.blake2b(text.encode('utf-8', 'ignore'), digest_size=16).digest()
+    lang = _cache.get(key)
+    if lang is not None:
+        _cache.move_to_end(key)
+        return lang
+
+    lang = _detect_with_model(text)
+    _cache[key] = lang
+    if len(_cache) > LANGID_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return lang
@@ -0,0 +1,235 @@
+"""Нагрузочный прогон collect_news на синтетических источниках.
+
+    python loadtest.py --sources 300 --latency 200 --error-rate 0.05 --rate-429 0.02
+
+Поднимает локальный HTTP-сервер с генерируемыми RSS и HTML-страницами и
+запускает collect_news против N источников, затем отбор лучших новостей цикла.
+Тексты русские и проходят фильтр, поэтому перевод не вызывается и сеть не нужна.
+Публикация не выполняется.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from aiohttp import web
+
+WORDS = "сталь прокат металлург руда чугун доменная печь выплавка комбинат завод тонна цена рынок поставки".split()
+
+
+def make_text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def make_rss(source_id: int, entries: int, desc_size: int) -> str:
+    rng = random.Random(source_id)
+    items = []
+    for i in range(entries):
+        items.append(
+            f"<item><title>Металлургия: новость {source_id}-{i} {make_text(rng, 40)}</title>"
+            f"<link>http://synthetic.local/{source_id}/{i}</link>"
+            f"<guid>synthetic-{source_id}-{i}</guid>"
+            f"<description>&lt;p&gt;{make_text(rng, desc_size)}&lt;/p&gt;</description></item>"
+        )
+    return f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>Лента {source_id}</title>{"".join(items)}</channel></rss>'
+
+
+def make_html(source_id: int, entries: int, desc_size: int) -> str:
+    rng = random.Random(source_id)
+    items = []
+    for i in range(entries):
+        items.append(
+            f"<div class='news-item'><h3><a href='/item/{source_id}/{i}'>Сталь: новость {source_id}-{i} {make_text(rng, 40)}</a></h3>"
+            f"<p class='description'>{make_text(rng, desc_size)}</p></div>"
+        )
+    # Шум вокруг новостей, как на настоящих страницах
+    filler = ''.join(f"<div class='menu'><a href='/m{i}'>{make_text(rng, 30)}</a></div>" for i in range(50))
+    return f"<html><head><title>Сайт {source_id}</title></head><body>{filler}{''.join(items)}</body></html>"
+
+
+class SyntheticServer:
+    """Сервер работает в отдельном процессе, чтобы генерация ответов не искажала замеры"""
+
+    def __init__(self, args, counters):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.requests, self.errors, self.throttled = counters
+        self.runner = None
+        self.port = None
+
+    async def _maybe_fail(self):
+        self.requests.value += 1
+        latency = self.args.latency / 1000
+        if latency:
+            await asyncio.sleep(max(0.0, self.rng.gauss(latency, latency * 0.3)))
+        roll = self.rng.random()
+        if roll < self.args.rate_429:
+            self.throttled.value += 1
+            return web.Response(status=429, headers={'Retry-After': str(self.args.retry_after)})
+        if roll < self.args.rate_429 + self.args.error_rate:
+            self.errors.value += 1
+            return web.Response(status=503)
+        return None
+
+    async def rss(self, request):
+        failure = await self._maybe_fail()
+        if failure is not None:
+            return failure
+        body = make_rss(int(request.match_info['id']), self.args.entries, self.args.desc_size)
+        return web.Response(text=body, content_type='application/rss+xml', charset='utf-8')
+
+    async def html(self, request):
+        failure = await self._maybe_fail()
+        if failure is not None:
+            return failure
+        body = make_html(int(request.match_info['id']), self.args.entries, self.args.desc_size)
+        return web.Response(text=body, content_type='text/html', charset='utf-8')
+
+    async def start(self) -> int:
+        app = web.Application()
+        app.router.add_get('/rss/{id}', self.rss)
+        app.router.add_get('/html/{id}', self.html)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        # Разные адреса 127.0.0.x — разные хосты для планировщика (работает на Linux)
+        hosts = [f"127.0.0.{i + 1}" for i in range(self.args.hosts)]
+        site = web.TCPSite(self.runner, hosts[0], 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        for host in hosts[1:]:
+            await web.TCPSite(self.runner, host, self.port).start()
+        return self.port
+
+
+def serve(args, counters, port_queue):
+    async def run_forever():
+        server = SyntheticServer(args, counters)
+        port_queue.put(await server.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(run_forever())
+
+
+def make_sources(count: int, html_ratio: float, hosts: List[str], port: int) -> List[Dict]:
+    sources = []
+    html_count = int(count * html_ratio)
+    for i in range(count):
+        host = hosts[i % len(hosts)]
+        if i < html_count:
+            sources.append({
+                'name': f"synthetic-html-{i}",
+                'type': 'html',
+                'url': f"http://{host}:{port}/html/{i}",
+                'selector': '.news-item',
+                'title_selector': 'h3 a',
+                'link_selector': 'h3 a',
+                'description_selector': '.description',
+            })
+        else:
+            sources.append({
+                'name': f"synthetic-rss-{i}",
+                'type': 'rss',
+                'url': f"http://{host}:{port}/rss/{i}",
+            })
+    return sources
+
+
+async def measure_loop_lag(samples: List[float], interval: float = 0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+async def run(args):
+    import main
+    from scheduler import fetch_scheduler
+    from loopwatch import loop_watchdog
+    from registry import source_registry
+
+    if args.host_rate is not None:
+        fetch_scheduler.host_rate = args.host_rate
+    if args.max_concurrent is not None:
+        fetch_scheduler.max_concurrent = args.max_concurrent
+
+    counters = tuple(multiprocessing.Value('i', 0) for _ in range(3))
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args, counters, port_queue), daemon=True)
+    server.start()
+    port = port_queue.get(timeout=30)
+    hosts = [f"127.0.0.{i + 1}" for i in range(args.hosts)]
+    sources = make_sources(args.sources, args.html_ratio, hosts, port)
+    source_registry.replace(sources)
+
+    lag_samples: List[float] = []
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples))
+    if args.watchdog_debug:
+        # Сторож пишет в лог, какая функция блокировала цикл и сколько
+        loop_watchdog.debug = True
+        loop_watchdog.start()
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    news = await main.collect_news()
+    selected = await main.news_pipeline.run(None, news)
+    elapsed = time.perf_counter() - started
+
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    lag_task.cancel()
+    loop_watchdog.stop()
+    server.terminate()
+    requests, errors, throttled = (counter.value for counter in counters)
+
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+    print(f"Источников: {len(source_registry)} (HTML {int(args.sources * args.html_ratio)}), хостов: {len(hosts)}")
+    print(f"Запросов к серверу: {requests}, ошибок 5xx: {errors}, 429: {throttled}")
+    print(f"Собрано новостей: {len(news)}, отобрано для публикации: {len(selected)}")
+    print(f"Время цикла: {elapsed:.1f}с")
+    print(f"Пиковая память процесса (RSS): {max_rss_mb:.0f} МБ")
+    if traced_peak is not None:
+        print(f"Пик выделений Python (tracemalloc): {traced_peak / (1024 * 1024):.1f} МБ")
+    if lag_samples:
+        lag_sorted = sorted(lag_samples)
+        p95 = lag_sorted[int(len(lag_sorted) * 0.95) - 1] if len(lag_sorted) >= 20 else lag_sorted[-1]
+        print(f"Задержка цикла событий: средняя {statistics.mean(lag_samples) * 1000:.1f} мс, "
+              f"p95 {p95 * 1000:.1f} мс, максимум {lag_sorted[-1] * 1000:.1f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон collect_news на синтетических источниках")
+    parser.add_argument('--sources', type=int, default=100, help="число источников")
+    parser.add_argument('--html-ratio', type=float, default=0.3, help="доля HTML-источников")
+    parser.add_argument('--entries', type=int, default=30, help="записей в ленте/на странице")
+    parser.add_argument('--desc-size', type=int, default=500, help="размер описания, символов")
+    parser.add_argument('--latency', type=float, default=100, help="средняя задержка ответа, мс")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After для 429, с")
+    parser.add_argument('--hosts', type=int, default=1, help="число адресов 127.0.0.x (Linux)")
+    parser.add_argument('--host-rate', type=float, help="переопределить HOST_RATE_LIMIT (0 — без лимита)")
+    parser.add_argument('--max-concurrent', type=int, help="переопределить MAX_CONCURRENT_FETCHES")
+    parser.add_argument('--watchdog-debug', action='store_true', help="логировать стеки блокирующего кода")
+    parser.add_argument('--tracemalloc', action='store_true', help="считать пик выделений Python (медленнее)")
+    parser.add_argument('--seed', type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+from config import LOOP_WATCHDOG_INTERVAL, LOOP_LAG_THRESHOLD, LOOP_WATCHDOG_DEBUG
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def describe_stack(frames: List[traceback.FrameSummary]) -> str:
+    """Имя функции, которая держит цикл: самый глубокий кадр из кода проекта"""
+    own = [frame for frame in frames if frame.filename.startswith(PROJECT_DIR)]
+    frame = (own or frames)[-1]
+    where = f"{frame.name} ({os.path.basename(frame.filename)}:{frame.lineno})"
+    if own and own[-1] is not frames[-1]:
+        innermost = frames[-1]
+        where += f" → {innermost.name} ({os.path.basename(innermost.filename)}:{innermost.lineno})"
+    return where
+
+
+class LoopWatchdog:
+    """Измеряет задержку цикла событий; в режиме отладки снимает стек блокирующего кода
+
+    Сердцебиение — корутина, которая засыпает на interval и замеряет опоздание.
+    Отладочный поток замечает, что сердцебиение давно не обновлялось, и снимает
+    стек потока цикла событий, пока тот ещё заблокирован.
+    """
+
+    def __init__(self, interval: float, threshold: float, debug: bool):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.blocked_total = 0.0
+        self._last_beat = time.monotonic()
+        self._sample: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = None
+        self._running = False
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._running = True
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        if self.debug:
+            self._thread = threading.Thread(target=self._monitor, name='loop-watchdog', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._last_beat = time.monotonic()
+            self.max_lag = max(self.max_lag, lag)
+            if lag < self.threshold:
+                continue
+            self.stalls += 1
+            self.blocked_total += lag
+            sample, self._sample = self._sample, None
+            if sample:
+                logger.warning(f"🐢 Цикл событий заблокирован на {lag * 1000:.0f} мс: {sample}")
+            else:
+                logger.warning(f"🐢 Цикл событий заблокирован на {lag * 1000:.0f} мс")
+
+    def _monitor(self):
+        while self._running:
+            time.sleep(self.interval)
+            if self._sample is not None:
+                continue
+            if time.monotonic() - self._last_beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            frames = traceback.extract_stack(frame)
+            self._sample = describe_stack(frames)
+            logger.debug("🐢 Стек блокирующего кода:\n" + ''.join(traceback.format_list(frames[-8:])))
+
+    def summary(self) -> str:
+        return (f"🐢 Цикл событий: макс. задержка {self.max_lag * 1000:.0f} мс, "
+                f"блокировок > {self.threshold * 1000:.0f} мс: {self.stalls} ({self.blocked_total:.1f}с)")
+
+    def reset(self):
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.blocked_total = 0.0
+
+
+loop_watchdog = LoopWatchdog(LOOP_WATCHDOG_INTERVAL, LOOP_LAG_THRESHOLD / 1000, LOOP_WATCHDOG_DEBUG)
@@ -1,39 +1,55 @@
 import asyncio
+import heapq
 import logging
-import hashlib
 import os
 import random
 import re
 import ssl
+import time
 from datetime import datetime
 from html import escape
-from typing import List, Dict, Optional, Set
-import aiohttp
-import httpx
-import cloudscraper
-import feedparser
-import chardet
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-from aiogram import Bot
-from aiogram.enums import ParseMode
-from deep_translator import GoogleTranslator
-from langdetect import detect, LangDetectException
+from typing import List, Optional, Set
 
 from config import (
+    validate_config,
     BOT_TOKEN,
-    CHANNEL_ID,
-    PREVIEW_CHANNEL_ID,
+    BOT_ROLE,
+    SHARD_ID,
+    OUTBOX_POLL_INTERVAL,
     CHECK_INTERVAL,
+    CYCLE_DEADLINE,
+    SOURCE_BUDGET,
     MAX_NEWS_PER_SOURCE,
-    DUPLICATES_FILE,
+    MAX_NEWS_PER_CYCLE,
+    MAX_RESPONSE_BYTES,
     STATIC_PROXY,
-    PROXY_SOURCE_URL,
     PLAYWRIGHT_HEADLESS,
     PLAYWRIGHT_TIMEOUT,
+    LOOP_WATCHDOG,
 )
-from sources import NEWS_SOURCES
-from filters import is_relevant
+from registry import Source, source_registry
+from filters import relevance_score, get_hashtags
+from scheduler import fetch_scheduler, fetch_started
+from proxies import proxy_manager
+from breaker import circuit_breakers
+from strategy import fetch_strategies
+from scraper import scraper_pool
+from backends import backend, import_report
+from langid import detect_language
+from textutil import html_to_text
+from replay import replay_archive, ReplayBot
+from cursors import feed_cursors, entry_key, entry_timestamp
+from publisher import publisher
+from translation import translator
+from items import NewsItem
+from pipeline import Pipeline
+from statestore import state_store
+from validators import http_validators
+from bodycache import body_cache, body_digest
+from loopwatch import loop_watchdog
+from sharding import owns_host
+from outbox import outbox
+from profiling import cycle_profiler
 
 logging.basicConfig(
     level=logging.INFO,  # Изменено с DEBUG на INFO для менее шумных логов
@@ -46,60 +62,32 @@ for lib_name in ["httpx", "httpcore", "urllib3", "aiohttp", "asyncio"]:
     lib_logger = logging.getLogger(lib_name)
     lib_logger.setLevel(logging.WARNING)
 
-if not BOT_TOKEN or not CHANNEL_ID:
-    logger.error("BOT_TOKEN и CHANNEL_ID должны быть установлены!")
-    raise ValueError("Отсутствуют обязательные переменные окружения")
+_bot = None
+
+
+def get_bot():
+    # Бот создаётся при первой публикации, чтобы импорт main.py не требовал токена
+    global _bot
+    if _bot is None:
+        if replay_archive.replaying:
+            _bot = ReplayBot()
+        else:
+            _bot = backend('aiogram').Bot(token=BOT_TOKEN)
+    return _bot
 
-bot = Bot(token=BOT_TOKEN)
 
 EMOJIS = {
     "start": ["🏭", "⚙️", "🔥", "📊", "🌍", "💡"],
     "end": ["🔗", "📰", "✨", "🚀", "⭐"]
 }
 
-PROXY_POOL: List[str] = []
-PROXY_INDEX = 0
-
-
-def load_proxy_pool():
-    global PROXY_POOL
-    if not PROXY_SOURCE_URL or PROXY_POOL:
-        return
-    try:
-        response = httpx.get(PROXY_SOURCE_URL, timeout=10.0)
-        if response.status_code == 200:
-            proxies = [line.strip() for line in response.text.splitlines() if line.strip()]
-            if proxies:
-                random.shuffle(proxies)
-                PROXY_POOL = proxies
-                logger.info(f"🌐 Загружено прокси: {len(PROXY_POOL)} шт.")
-            else:
-                logger.warning("⚠️ Список прокси пуст")
-        else:
-            logger.warning(f"⚠️ Не удалось загрузить прокси, статус {response.status_code}")
-    except Exception as e:
-        logger.warning(f"⚠️ Ошибка загрузки списка прокси: {e}")
-
-
 def get_next_proxy() -> Optional[str]:
-    global PROXY_INDEX
-    
     # Приоритет 1: Статический прокси (если указан)
     if STATIC_PROXY:
         return STATIC_PROXY
     
-    # Приоритет 2: Бесплатные прокси из списка
-    if not PROXY_SOURCE_URL:
-        return None
-    if not PROXY_POOL:
-        load_proxy_pool()
-    if not PROXY_POOL:
-        return None
-    proxy = PROXY_POOL[PROXY_INDEX % len(PROXY_POOL)]
-    PROXY_INDEX += 1
-    if not proxy.startswith("http"):
-        proxy = f"http://{proxy}"
-    return proxy
+    # Приоритет 2: Самый быстрый рабочий прокси из пула
+    return proxy_manager.best()
 
 
 def cleanup_logs():
@@ -163,7 +151,7 @@ def clean_description(description: str, title: str = '') -> str:
         return description
     
     # Убираем HTML теги, если остались
-    description = re.sub(r'<[^>]+>', '', description)
+    description = html_to_text(description)
     
     # Убираем дублирование заголовка в начале описания
     if title:
@@ -200,17 +188,19 @@ def clean_description(description: str, title: str = '') -> str:
     return description
 
 
-async def fetch_html_with_playwright(url: str, source: Dict) -> Optional[str]:
+async def fetch_html_with_playwright(url: str, source: Source) -> Optional[str]:
+    static_proxy = get_next_proxy()
+    started = time.monotonic()
     try:
         proxy_config = None
-        static_proxy = get_next_proxy()
         
         # Настройка прокси для Playwright (только для SOCKS5 или HTTP)
         if static_proxy:
             if static_proxy.startswith('socks5://') or static_proxy.startswith('http://'):
                 proxy_config = {"server": static_proxy}
         
-        async with async_playwright() as playwright:
+        async_playwright = backend('playwright').async_playwright
+        async with fetch_scheduler.slot(url), async_playwright() as playwright:
             browser_args = ["--no-sandbox", "--disable-dev-shm-usage"]
             browser = await playwright.chromium.launch(
                 headless=PLAYWRIGHT_HEADLESS,
@@ -220,70 +210,80 @@ async def fetch_html_with_playwright(url: str, source: Dict) -> Optional[str]:
             context = await browser.new_context()
             page = await context.new_page()
             await page.goto(url, wait_until="networkidle", timeout=PLAYWRIGHT_TIMEOUT)
-            await asyncio.sleep(source.get("render_wait", 1))
+            await asyncio.sleep(source.render_wait)
             content = await page.content()
             await context.close()
             await browser.close()
-            logger.info(f"🎭 {source['name']}: контент получен через Playwright")
+            proxy_manager.report(static_proxy, True, time.monotonic() - started)
+            logger.info(f"🎭 {source.name}: контент получен через Playwright")
             return content
     except Exception as e:
-        logger.error(f"Ошибка Playwright для {source['name']}: {e}")
+        proxy_manager.report(static_proxy, False)
+        logger.error(f"Ошибка Playwright для {source.name}: {e}")
     return None
 
-def load_processed_urls() -> Set[str]:
-    try:
-        with open(DUPLICATES_FILE, 'r', encoding='utf-8') as f:
-            return set(line.strip() for line in f if line.strip())
-    except FileNotFoundError:
-        return set()
+# Закрывающий тег записи RSS/Atom, в том числе с префиксом пространства имён
+FEED_ENTRY_END = re.compile(rb'</(?:[\w-]+:)?(?:item|entry)\s*>', re.IGNORECASE)
 
-def save_processed_url(url: str):
-    with open(DUPLICATES_FILE, 'a', encoding='utf-8') as f:
-        f.write(f"{url}\n")
 
-def get_url_hash(url: str) -> str:
-    return hashlib.md5(url.encode()).hexdigest()
+def close_truncated_feed(body: bytes) -> bytes:
+    """Дописывает закрывающие теги к ленте, обрезанной после записи"""
+    head = body[:1024].lower()
+    if b'<rdf:rdf' in head:
+        return body + b'</rdf:RDF>'
+    if b'<feed' in head:
+        return body + b'</feed>'
+    return body + b'</channel></rss>'
 
-def detect_language(text: str) -> str:
-    try:
-        if not text or len(text.strip()) < 3:
-            return 'unknown'
-        return detect(text)
-    except LangDetectException:
-        return 'unknown'
 
-def translate_to_russian(text: str) -> str:
-    if not text or not text.strip():
-        return text
-    
-    try:
-        lang = detect_language(text)
-        
-        if lang == 'ru' or lang == 'unknown':
-            return text
-        
-        translator = GoogleTranslator(source=lang, target='ru')
-        
-        if len(text) > 4500:
-            text = text[:4500]
-        
-        translated = translator.translate(text)
-        return translated if translated else text
-        
-    except Exception as e:
-        logger.warning(f"Ошибка перевода текста: {e}")
-        return text
+async def read_feed_body(response, name: str) -> bytes:
+    """Читает ленту потоком: не больше MAX_RESPONSE_BYTES и только нужное число записей"""
+    needed = MAX_NEWS_PER_SOURCE * 2
+    body = bytearray()
+    found = 0
+    scan_from = 0
+    async for chunk in response.content.iter_chunked(65536):
+        # Тег может оказаться на стыке кусков, поэтому захватываем хвост предыдущего
+        scan_from = max(scan_from, len(body) - 32)
+        body += chunk
+        for match in FEED_ENTRY_END.finditer(body, scan_from):
+            found += 1
+            scan_from = match.end()
+            if found >= needed:
+                return close_truncated_feed(bytes(body[:match.end()]))
+        if len(body) >= MAX_RESPONSE_BYTES:
+            logger.warning(f"⚠️ {name}: лента больше {MAX_RESPONSE_BYTES // 1024} КБ, дочитывать не будем")
+            return close_truncated_feed(bytes(body[:MAX_RESPONSE_BYTES]))
+    return bytes(body)
 
-async def parse_rss(source: Dict) -> List[Dict]:
-    news_items = []
-    parsed_count = 0
-    filtered_out = 0
+
+# Лента не изменилась с прошлого запроса (HTTP 304)
+NOT_MODIFIED = object()
+
+
+async def fetch_rss(source: Source):
+    """Загружает ленту; возвращает сырые байты и кодировку из заголовков, NOT_MODIFIED или None"""
+    if replay_archive.replaying:
+        return replay_archive.load(source)
+
+    aiohttp = backend('aiohttp')
+    headers = {'User-Agent': 'Mozilla/5.0 (compatible; RSSBot/1.0)'}
+    # При записи архива нужны полные ответы, поэтому условные запросы не используем.
+    # Без разобранного ответа в памяти (первый цикл после запуска) ответ 304 не даст
+    # ожидающих публикации записей, поэтому ленту запрашиваем целиком
+    if not replay_archive.recording and body_cache.has(source.name):
+        headers.update(http_validators.headers(source.name))
 
     # Retry логика для сетевых ошибок
     max_retries = 3
     retry_delay = 2
+    retry_wait = 0
     
     for retry in range(max_retries):
+        # Пауза между попытками вне слота планировщика, чтобы не занимать его
+        if retry_wait:
+            await asyncio.sleep(retry_wait)
+            retry_wait = 0
         try:
             ssl_context = ssl.create_default_context()
             ssl_context.check_hostname = False
@@ -311,220 +311,395 @@ async def parse_rss(source: Dict) -> List[Dict]:
                 timeout=timeout_settings,
                 raise_for_status=False
             ) as session:
-                async with session.get(
-                    source['url'],
-                    headers={'User-Agent': 'Mozilla/5.0 (compatible; RSSBot/1.0)'}
+                async with fetch_scheduler.slot(source.url), session.get(
+                    source.url,
+                    headers=headers
                 ) as response:
+                    if response.status == 304:
+                        return NOT_MODIFIED
                     if response.status != 200:
-                        # HTTP 429 (Too Many Requests) - нужна большая задержка
+                        # HTTP 429 (Too Many Requests) - пауза общая для всех источников хоста и учитывает Retry-After
                         if response.status == 429:
-                            delay = 30 * (retry + 1)  # 30с, 60с, 90с для 429
+                            delay = fetch_scheduler.register_retry_after(source.url, response.headers.get('Retry-After'))
                             if retry < max_retries - 1:
-                                logger.warning(f"⚠️ {source['name']}: HTTP 429 (Too Many Requests), повтор через {delay}с (попытка {retry+1}/{max_retries})")
-                                await asyncio.sleep(delay)
+                                logger.warning(f"⚠️ {source.name}: HTTP 429 (Too Many Requests), повтор через {delay:.0f}с (попытка {retry+1}/{max_retries})")
                                 continue
                             else:
-                                logger.error(f"❌ {source['name']}: HTTP 429 после {max_retries} попыток")
-                                return []
+                                logger.error(f"❌ {source.name}: HTTP 429 после {max_retries} попыток")
+                                return None
                         # HTTP 403 (Forbidden) или другие ошибки
                         elif response.status in [403, 404]:
                             if retry < max_retries - 1:
                                 delay = retry_delay * (retry + 1)
-                                logger.warning(f"⚠️ {source['name']}: HTTP {response.status}, повтор через {delay}с (попытка {retry+1}/{max_retries})")
-                                await asyncio.sleep(delay)
+                                logger.warning(f"⚠️ {source.name}: HTTP {response.status}, повтор через {delay}с (попытка {retry+1}/{max_retries})")
+                                retry_wait = delay
                                 continue
                             else:
-                                logger.error(f"❌ {source['name']}: HTTP {response.status} после {max_retries} попыток")
-                                return []
+                                logger.error(f"❌ {source.name}: HTTP {response.status} после {max_retries} попыток")
+                                return None
                         else:
                             if retry < max_retries - 1:
                                 delay = retry_delay * (retry + 1)
-                                logger.warning(f"⚠️ {source['name']}: HTTP {response.status}, повтор через {delay}с (попытка {retry+1}/{max_retries})")
-                                await asyncio.sleep(delay)
+                                logger.warning(f"⚠️ {source.name}: HTTP {response.status}, повтор через {delay}с (попытка {retry+1}/{max_retries})")
+                                retry_wait = delay
                                 continue
                             else:
-                                logger.error(f"❌ {source['name']}: HTTP {response.status} после {max_retries} попыток")
-                                return []
-                    
-                    raw_bytes = await response.read()
-                    detected = chardet.detect(raw_bytes)
-                    encoding = response.charset or detected.get('encoding') or 'utf-8'
-                    
-                    # Нормализуем названия кодировок
-                    encoding_mapping = {
-                        'windows1251': 'cp1251',
-                        'windows-1251': 'cp1251',
-                        'cp1251': 'cp1251',
-                        'iso-8859-1': 'latin1',
-                        'iso8859-1': 'latin1',
-                    }
-                    encoding = encoding_mapping.get(encoding.lower(), encoding)
-                    
-                    # Если chardet не определил или дал неподдерживаемую кодировку
-                    if not encoding or encoding.lower() not in ['utf-8', 'cp1251', 'latin1', 'ascii', 'utf-16']:
-                        try:
-                            # Пробуем стандартные кодировки
-                            for enc in ['utf-8', 'cp1251', 'latin1']:
-                                try:
-                                    decoded_content = raw_bytes.decode(enc, errors='strict')
-                                    encoding = enc
-                                    break
-                                except:
-                                    continue
-                            else:
-                                decoded_content = raw_bytes.decode('utf-8', errors='ignore')
-                        except:
-                            decoded_content = raw_bytes.decode('utf-8', errors='ignore')
-                    else:
-                        decoded_content = raw_bytes.decode(encoding, errors='ignore')
-                    feed_content = sanitize_feed_content(decoded_content)
-                    feed = feedparser.parse(feed_content)
-                
-                if feed.bozo and feed.bozo_exception:
-                    logger.warning(f"⚠️ RSS парсинг {source['name']}: {feed.bozo_exception}")
-                
-                if not hasattr(feed, 'entries') or not feed.entries:
-                    logger.info(f"📥 {source['name']}: найдено 0 записей в RSS")
-                    return []
-                
-                total_entries = len(feed.entries[:MAX_NEWS_PER_SOURCE * 2])
-                logger.info(f"📥 {source['name']}: найдено {total_entries} записей в RSS")
-                
-                for entry in feed.entries[:MAX_NEWS_PER_SOURCE * 2]:
-                    parsed_count += 1
-                    title = entry.get('title', '').strip()
-                    link = entry.get('link', '').strip()
-                    description = entry.get('description', '') or entry.get('summary', '') or entry.get('content', [{}])[0].get('value', '') if entry.get('content') else ''
-                    
-                    # Очищаем HTML из описания
-                    if description:
-                        soup_desc = BeautifulSoup(description, 'html.parser')
-                        description = soup_desc.get_text(separator=' ', strip=True)
-                    
-                    # Пропускаем если нет заголовка или ссылки
-                    if not title or len(title.strip()) < 3 or not link:
-                        filtered_out += 1
-                        continue
-                    
-                    combined_text = f"{title} {description}"
-                    include_all = source.get('always_include', False)
+                                logger.error(f"❌ {source.name}: HTTP {response.status} после {max_retries} попыток")
+                                return None
                     
-                    if (include_all or is_relevant(combined_text)) and link:
-                        # Переводим и очищаем заголовок
-                        translated_title = translate_to_russian(title)
-                        cleaned_title = clean_title(translated_title)
-                        
-                        # Защита: если заголовок стал пустым после очистки, используем оригинальный переведенный
-                        if not cleaned_title or len(cleaned_title.strip()) < 3:
-                            cleaned_title = translated_title.strip() if translated_title else title.strip()
-                        
-                        # Переводим и очищаем описание
-                        translated_description = translate_to_russian(description)
-                        cleaned_description = clean_description(translated_description, cleaned_title)
-                        
-                        news_items.append({
-                            'title': cleaned_title,
-                            'description': cleaned_description,
-                            'link': link,
-                            'source': source['name']
-                        })
-                        
-                        if len(news_items) >= MAX_NEWS_PER_SOURCE:
-                            break
-                    else:
-                        filtered_out += 1
-                        
-                if parsed_count > 0 and len(news_items) == 0:
-                    logger.warning(f"⚠️ {source['name']}: распарсено {parsed_count}, отфильтровано {filtered_out}, релевантных 0")
-            
-            # Успешная загрузка, выходим из retry цикла
-            break
+                    raw_bytes = await read_feed_body(response, source.name)
+                    http_validators.update(source.name, response.headers)
+                    if replay_archive.recording:
+                        replay_archive.save(source, raw_bytes, response.charset)
+                    return raw_bytes, response.charset
                             
         except (aiohttp.ClientConnectorError, aiohttp.ClientError, asyncio.TimeoutError, ssl.SSLError) as e:
             error_type = type(e).__name__
             if retry < max_retries - 1:
                 delay = retry_delay * (retry + 1)
-                logger.warning(f"⚠️ {source['name']}: {error_type} (попытка {retry+1}/{max_retries}), повтор через {delay}с: {str(e)[:100]}")
+                logger.warning(f"⚠️ {source.name}: {error_type} (попытка {retry+1}/{max_retries}), повтор через {delay}с: {str(e)[:100]}")
                 await asyncio.sleep(delay)
             else:
-                logger.error(f"❌ {source['name']}: {error_type} после {max_retries} попыток: {str(e)[:200]}")
-                return []
-        except Exception as e:
-            logger.error(f"❌ Ошибка парсинга RSS {source['name']}: {type(e).__name__}: {str(e)[:200]}")
-            return []
+                logger.error(f"❌ {source.name}: {error_type} после {max_retries} попыток: {str(e)[:200]}")
+                return None
     
-    return news_items
+    return None
 
-async def parse_html(source: Dict) -> List[Dict]:
-    news_items = []
-    parsed_count = 0
-    filtered_out = 0
+def decode_feed(raw_bytes: bytes, charset: Optional[str], source_encoding: Optional[str] = None) -> str:
+    # Кодировка из описания источника уже проверена реестром и применяется как есть;
+    # список поддерживаемых и подбор ниже — только для заголовков сервера и chardet
+    if source_encoding:
+        return raw_bytes.decode(source_encoding, errors='replace')
+    # chardet нужен только без кодировки в заголовках; для определения достаточно начала документа
+    encoding = charset or backend('chardet').detect(raw_bytes[:65536]).get('encoding') or 'utf-8'
     
-    content = None
-    proxy_required = source.get('use_proxy')
-    render_js = source.get('render_js')
-    last_error = None
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
+    # Нормализуем названия кодировок
+    encoding_mapping = {
+        'windows1251': 'cp1251',
+        'windows-1251': 'cp1251',
+        'cp1251': 'cp1251',
+        'iso-8859-1': 'latin1',
+        'iso8859-1': 'latin1',
     }
-
-    for attempt in range(3):
-        proxy = get_next_proxy() if proxy_required else None
+    encoding = encoding_mapping.get(encoding.lower(), encoding)
+    
+    # Если chardet не определил или дал неподдерживаемую кодировку
+    if not encoding or encoding.lower() not in ['utf-8', 'cp1251', 'latin1', 'ascii', 'utf-16']:
         try:
-            if attempt == 0:
-                client_kwargs = dict(verify=False, timeout=30.0, follow_redirects=True)
-                if proxy:
-                    client_kwargs['proxies'] = proxy
-                async with httpx.AsyncClient(**client_kwargs) as client:
-                    response = await client.get(source['url'], headers=headers)
-                    if response.status_code == 200:
-                        content = response.text
-                        break
-                    else:
-                        last_error = f"HTTP {response.status_code}"
-                        logger.debug(f"⚠️ {source['name']}: HTTP {response.status_code} при первичной загрузке")
-
-            elif attempt == 1:
-                scraper = cloudscraper.create_scraper(
-                    browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True}
-                )
-                if proxy:
-                    scraper.proxies.update({'http': proxy, 'https': proxy})
-                response = scraper.get(source['url'], timeout=30)
-                if response.status_code == 200:
-                    content = response.text
+            # Пробуем стандартные кодировки
+            for enc in ['utf-8', 'cp1251', 'latin1']:
+                try:
+                    decoded_content = raw_bytes.decode(enc, errors='strict')
+                    encoding = enc
                     break
-                else:
-                    last_error = f"HTTP {response.status_code}"
-                    logger.debug(f"⚠️ {source['name']}: HTTP {response.status_code} через cloudscraper")
+                except:
+                    continue
+            else:
+                decoded_content = raw_bytes.decode('utf-8', errors='ignore')
+        except:
+            decoded_content = raw_bytes.decode('utf-8', errors='ignore')
+    else:
+        decoded_content = raw_bytes.decode(encoding, errors='ignore')
+    return decoded_content
+
+def filter_items(source: Source, items: List[NewsItem]) -> List[NewsItem]:
+    """Оценивает записи и отбрасывает нерелевантные; остаются MAX_NEWS_PER_SOURCE лучших"""
+    # При воспроизведении свежесть не учитывается, чтобы отбор не зависел от времени прогона
+    now = None if replay_archive.replaying else time.time()
+    relevant = []
+    for item in items:
+        if len(item.title) < 3 or not item.link:
+            continue
+        item.score = relevance_score(item.title, item.description, source.priority, item.published, now, source.always_include)
+        if item.score > 0:
+            relevant.append(item)
+    if not relevant:
+        logger.warning(f"⚠️ {source.name}: распарсено {len(items)}, отфильтровано {len(items)}, релевантных 0")
+    return heapq.nlargest(MAX_NEWS_PER_SOURCE, relevant, key=lambda item: item.score)
+
+
+def dedup_items(source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+    """Уже опубликованные во всех каналах и повторяющиеся в цикле новости не переводим"""
+    queued: Set[str] = set()
+    unique = []
+    for item in items:
+        if item.url_hash in queued or publisher.is_published(item.url_hash):
+            continue
+        queued.add(item.url_hash)
+        unique.append(item)
+    return unique
+
+
+def select_items(source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+    """Оставляет MAX_NEWS_PER_CYCLE лучших новостей цикла (частичная сортировка кучей); лучшие публикуются первыми"""
+    if MAX_NEWS_PER_CYCLE and len(items) > MAX_NEWS_PER_CYCLE:
+        logger.info(f"🏆 Отобрано {MAX_NEWS_PER_CYCLE} лучших новостей из {len(items)}")
+        return heapq.nlargest(MAX_NEWS_PER_CYCLE, items, key=lambda item: item.score)
+    return sorted(items, key=lambda item: item.score, reverse=True)
+
+
+async def translate_items(source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+    async def translate_item(item: NewsItem):
+        # Язык определяем один раз для всей записи, заголовок и описание переводятся одной пачкой
+        item.lang = detect_language(f"{item.title} {item.description}")
+        item.title, item.description = await translator.translate([item.title, item.description], item.lang)
+
+    await asyncio.gather(*(translate_item(item) for item in items))
+    return items
+
+
+def clean_items(source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+    for item in items:
+        cleaned_title = clean_title(item.title)
+        # Защита: если очистка удалила весь заголовок, используем переведённый оригинал
+        if cleaned_title and len(cleaned_title.strip()) >= 3:
+            item.title = cleaned_title
+        item.title = item.title.strip()
+        item.description = clean_description(item.description, item.title)
+    return items
 
-            await asyncio.sleep(2)
 
+def tag_items(source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+    for item in items:
+        item.hashtags = get_hashtags(f"{item.title} {item.description}")
+    return items
+
+
+def format_items(source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+    for item in items:
+        item.text = format_post(item)
+    return items
+
+
+# Порядок этапов задаётся здесь; время каждого этапа попадает в сводку цикла.
+# Записи каждого источника только оцениваются, а переводятся и оформляются
+# лишь лучшие новости всего цикла
+source_pipeline = Pipeline([
+    ('filter', filter_items),
+], 'Этапы источников')
+
+news_pipeline = Pipeline([
+    ('dedup', dedup_items),
+    ('select', select_items),
+    ('translate', translate_items),
+    ('clean', clean_items),
+    ('tag', tag_items),
+    ('format', format_items),
+])
+# Этапы цикла идут один раз и по очереди, поэтому профилируются по отдельности
+news_pipeline.stage_hook = cycle_profiler.phase
+
+
+def pending_items(source: Source, items: List[NewsItem]) -> List[NewsItem]:
+    """Из новостей прошлого разбора ленты оставляет записи, ещё ожидающие публикации"""
+    if replay_archive.replaying:
+        return items
+    pending = set(feed_cursors.pending.get(source.name, {}).values())
+    return [item for item in items if item.url_hash in pending]
+
+
+async def parse_rss(source: Source) -> List[NewsItem]:
+    news_items = []
+
+    fetched = await fetch_rss(source)
+    if fetched is NOT_MODIFIED:
+        circuit_breakers.record_success(source.name)
+        logger.info(f"📭 {source.name}: лента не изменилась (304)")
+        # Записи, ещё не опубликованные (ошибка отправки, не попали в лучшие), предлагаем снова
+        cached = pending_items(source, body_cache.latest(source.name) or [])
+        return await source_pipeline.run(source, cached) if cached else []
+    if fetched is None:
+        circuit_breakers.record_failure(source.name)
+        return []
+    circuit_breakers.record_success(source.name)
+    raw_bytes, charset = fetched
+
+    # Лента не изменилась с прошлого цикла — берём ожидающие записи прошлого разбора и пересчитываем оценку
+    digest = body_digest(raw_bytes)
+    cached = body_cache.lookup(source.name, digest)
+    if cached is not None:
+        logger.info(f"♻️ {source.name}: лента не изменилась, разбор пропущен")
+        cached = pending_items(source, cached)
+        return await source_pipeline.run(source, cached) if cached else []
+
+    try:
+        # Промежуточные копии документа освобождаем сразу, чтобы они не жили одновременно
+        # Кодировка из описания источника важнее заголовков сервера
+        feed_content = decode_feed(raw_bytes, charset, source.encoding)
+        del raw_bytes, fetched
+        feed_content = sanitize_feed_content(feed_content)
+        feed = backend('feedparser').parse(feed_content)
+        del feed_content
+        
+        if feed.bozo and feed.bozo_exception:
+            logger.warning(f"⚠️ RSS парсинг {source.name}: {feed.bozo_exception}")
+        
+        entries = feed.get('entries', [])[:MAX_NEWS_PER_SOURCE * 2]
+        del feed
+        
+        if not entries:
+            logger.info(f"📥 {source.name}: найдено 0 записей в RSS")
+            return []
+        
+        total_entries = len(entries)
+        logger.info(f"📥 {source.name}: найдено {total_entries} записей в RSS")
+        
+        # В режиме воспроизведения архив разбирается целиком при каждом прогоне
+        seen = set() if replay_archive.replaying else feed_cursors.get(source.name)
+        
+        present = [entry_key(entry) for entry in entries]
+        parsed_keys = []
+        # Хеш ссылки -> guid записи, чтобы отметить отобранные фильтром записи
+        item_keys = {}
+        for key, entry in zip(present, entries):
+            # Обработанные записи пропускаем, но не останавливаемся: порядок в ленте бывает любым
+            if feed_cursors.is_seen(seen, entry):
+                continue
+            parsed_keys.append(key)
+            content = entry.get('content')
+            description = entry.get('description', '') or entry.get('summary', '') or (content[0].get('value', '') if content else '')
+            # Очищаем HTML из описания
+            news_item = NewsItem(entry.get('title', ''), html_to_text(description), entry.get('link', ''), source.name,
+                                 entry_timestamp(entry))
+            item_keys[news_item.url_hash] = key
+            news_items.append(news_item)
+        
+        del entries
+        if not news_items:
+            logger.info(f"📭 {source.name}: новых записей нет")
+        news_items = await source_pipeline.run(source, news_items)
+        # Отметки меняем только после обработки: отменённый по времени источник перечитает записи
+        if not replay_archive.replaying:
+            pending = {item_keys[item.url_hash]: item.url_hash for item in news_items}
+            feed_cursors.track(source.name, present, parsed_keys, pending)
+        body_cache.store(source.name, digest, news_items)
+        return news_items
+            
+    except Exception as e:
+        logger.error(f"❌ Ошибка парсинга RSS {source.name}: {type(e).__name__}: {str(e)[:200]}")
+        return []
+
+HTML_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+
+class FetchError(Exception):
+    """Сайт ответил, но не отдал контент (код ответа не 200)"""
+
+
+async def fetch_with_httpx(source: Source, proxy: Optional[str]) -> str:
+    httpx = backend('httpx')
+    client_kwargs = dict(verify=False, timeout=30.0, follow_redirects=True)
+    if proxy:
+        client_kwargs['proxy'] = proxy
+    async with fetch_scheduler.slot(source.url), httpx.AsyncClient(**client_kwargs) as client:
+        async with client.stream('GET', source.url, headers=HTML_HEADERS) as response:
+            if response.status_code != 200:
+                if response.status_code == 429:
+                    fetch_scheduler.register_retry_after(source.url, response.headers.get('Retry-After'))
+                raise FetchError(f"HTTP {response.status_code}")
+            # Читаем не больше MAX_RESPONSE_BYTES, остаток страницы не скачиваем
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= MAX_RESPONSE_BYTES:
+                    logger.warning(f"⚠️ {source.name}: страница больше {MAX_RESPONSE_BYTES // 1024} КБ, обрезана")
+                    break
+            encoding = source.encoding or response.encoding or 'utf-8'
+    return body[:MAX_RESPONSE_BYTES].decode(encoding, errors='replace')
+
+
+async def fetch_with_cloudscraper(source: Source, proxy: Optional[str]) -> str:
+    async with fetch_scheduler.slot(source.url):
+        response = await scraper_pool.get(source.url, proxy)
+    if response.status_code != 200:
+        if response.status_code == 429:
+            fetch_scheduler.register_retry_after(source.url, response.headers.get('Retry-After'))
+        raise FetchError(f"HTTP {response.status_code}")
+    return response.text
+
+
+async def fetch_with_playwright(source: Source, proxy: Optional[str]) -> str:
+    # Playwright сам выбирает прокси
+    content = await fetch_html_with_playwright(source.url, source)
+    if not content:
+        raise FetchError("Playwright не вернул контент")
+    return content
+
+
+HTML_FETCHERS = {
+    'httpx': fetch_with_httpx,
+    'cloudscraper': fetch_with_cloudscraper,
+    'playwright': fetch_with_playwright,
+}
+
+
+async def fetch_html(source: Source) -> Optional[str]:
+    """Загружает HTML, начиная со способа, который сработал в прошлый раз"""
+    if replay_archive.replaying:
+        archived = replay_archive.load(source)
+        return archived[0].decode('utf-8', errors='ignore') if archived else None
+
+    last_error = None
+    for idx, tier in enumerate(fetch_strategies.plan(source)):
+        if idx:
+            await asyncio.sleep(2)
+        proxy = get_next_proxy() if source.use_proxy and tier != 'playwright' else None
+        started = time.monotonic()
+        try:
+            content = await HTML_FETCHERS[tier](source, proxy)
+        except FetchError as e:
+            last_error = str(e)
+            logger.debug(f"⚠️ {source.name}: {e} через {tier}")
+            continue
         except Exception as e:
             last_error = str(e)
-            if attempt == 2:
-                logger.error(f"Ошибка парсинга HTML {source['name']} (все попытки): {e}")
+            proxy_manager.report(proxy, False)
+            logger.debug(f"⚠️ {source.name}: ошибка {tier}: {e}")
             continue
+        latency = time.monotonic() - started
+        if len(content) > MAX_RESPONSE_BYTES:
+            content = content[:MAX_RESPONSE_BYTES]
+        proxy_manager.report(proxy, True, latency)
+        fetch_strategies.record(source.name, tier, latency)
+        if replay_archive.recording:
+            replay_archive.save(source, content.encode('utf-8'), 'utf-8')
+        return content
 
-    if not content and render_js:
-        content = await fetch_html_with_playwright(source['url'], source)
+    if last_error:
+        logger.warning(f"⚠️ {source.name}: не удалось получить контент (последняя ошибка: {last_error})")
+    return None
 
+async def parse_html(source: Source) -> List[NewsItem]:
+    news_items = []
+    
+    content = await fetch_html(source)
     if not content:
-        if last_error:
-            logger.warning(f"⚠️ {source['name']}: не удалось получить контент (последняя ошибка: {last_error})")
+        circuit_breakers.record_failure(source.name)
         return news_items
+
+    circuit_breakers.record_success(source.name)
     
+    # Страница не изменилась с прошлого цикла — берём отобранные в прошлый раз записи и пересчитываем оценку
+    digest = body_digest(content)
+    cached = body_cache.lookup(source.name, digest)
+    if cached is not None:
+        logger.info(f"♻️ {source.name}: страница не изменилась, разбор пропущен")
+        return await source_pipeline.run(source, cached)
+    
+    soup = None
     try:
-        soup = BeautifulSoup(content, 'lxml')
+        soup = backend('bs4').BeautifulSoup(content, 'lxml')
+        del content
         
         # Попробуем разные варианты селекторов
-        articles = soup.select(source['selector'])[:MAX_NEWS_PER_SOURCE * 2]
+        articles = source.selector.select(soup, limit=MAX_NEWS_PER_SOURCE * 2)
         
         # Если ничего не найдено, попробуем более универсальные селекторы
         if not articles:
@@ -536,19 +711,16 @@ async def parse_html(source: Dict) -> List[Dict]:
             for alt_sel in alternative_selectors:
                 articles = soup.select(alt_sel)[:MAX_NEWS_PER_SOURCE * 2]
                 if articles:
-                    logger.info(f"📥 {source['name']}: использован альтернативный селектор '{alt_sel}'")
+                    logger.info(f"📥 {source.name}: использован альтернативный селектор '{alt_sel}'")
                     break
         
-        logger.info(f"📥 {source['name']}: найдено {len(articles)} элементов HTML")
+        logger.info(f"📥 {source.name}: найдено {len(articles)} элементов HTML")
         
-        include_all = source.get('always_include', False)
-
         for article in articles:
-            parsed_count += 1
             try:
-                title_elem = article.select_one(source['title_selector'])
-                link_elem = article.select_one(source['link_selector'])
-                desc_elem = article.select_one(source.get('description_selector', ''))
+                title_elem = source.title_selector.select_one(article)
+                link_elem = source.link_selector.select_one(article)
+                desc_elem = source.description_selector.select_one(article) if source.description_selector else None
                 
                 # Извлекаем заголовок с множественными fallback вариантами
                 title = ''
@@ -624,92 +796,128 @@ async def parse_html(source: Dict) -> List[Dict]:
                 
                 if link and not link.startswith('http'):
                     from urllib.parse import urljoin
-                    link = urljoin(source['url'], link)
-                
-                # Пропускаем если нет заголовка или ссылки (после всех попыток извлечения)
-                if not title or len(title.strip()) < 3 or not link or not link.strip():
-                    filtered_out += 1
-                    continue
-                
-                # Нормализуем заголовок и ссылку перед использованием
-                title = title.strip()
-                link = link.strip()
+                    link = urljoin(source.url, link)
                 
-                # Используем заголовок для проверки релевантности (без агрессивной очистки на этом этапе)
-                combined_text = f"{title} {description}"
-                
-                if (include_all or is_relevant(combined_text)) and link:
-                    # Переводим заголовок
-                    translated_title = translate_to_russian(title)
-                    
-                    # Очищаем переведённый заголовок от лишних элементов
-                    cleaned_title = clean_title(translated_title)
-                    
-                    # Защита: если очистка удалила весь заголовок, используем переведённый оригинал
-                    if not cleaned_title or len(cleaned_title.strip()) < 3:
-                        cleaned_title = translated_title.strip()
-                    
-                    # Переводим и очищаем описание
-                    translated_description = translate_to_russian(description)
-                    cleaned_description = clean_description(translated_description, cleaned_title)
-                    
-                    news_items.append({
-                        'title': cleaned_title,
-                        'description': cleaned_description,
-                        'link': link,
-                        'source': source['name']
-                    })
-                    
-                    if len(news_items) >= MAX_NEWS_PER_SOURCE:
-                        break
-                else:
-                    filtered_out += 1
+                news_items.append(NewsItem(title, description, link, source.name))
             except Exception as e:
-                logger.error(f"Ошибка обработки статьи из {source['name']}: {e}")
+                logger.error(f"Ошибка обработки статьи из {source.name}: {e}")
                 continue
-        
-        if parsed_count > 0 and len(news_items) == 0:
-            logger.warning(f"⚠️ {source['name']}: распарсено {parsed_count}, отфильтровано {filtered_out}, релевантных 0")
                 
     except Exception as e:
-        logger.error(f"Ошибка обработки HTML {source['name']}: {e}")
+        logger.error(f"Ошибка обработки HTML {source.name}: {e}")
+    finally:
+        # Дерево документа больше не нужно — разрываем ссылки, чтобы память освободилась сразу
+        if soup is not None:
+            soup.decompose()
     
+    news_items = await source_pipeline.run(source, news_items)
+    body_cache.store(source.name, digest, news_items)
     return news_items
 
-async def collect_news() -> List[Dict]:
+SOURCE_PARSERS = {
+    'rss': parse_rss,
+    'html': parse_html,
+}
+
+
+# Источники, отменённые по сроку цикла; в следующем цикле они идут первыми
+deferred_sources: Set[str] = set()
+
+
+async def parse_with_budget(source: Source) -> List[NewsItem]:
+    """Разбирает источник; бюджет SOURCE_BUDGET отсчитывается с первого слота планировщика, а не с очереди"""
+    if not SOURCE_BUDGET:
+        return await SOURCE_PARSERS[source.type](source)
+    started = asyncio.Event()
+    token = fetch_started.set(started)
+    task = asyncio.create_task(SOURCE_PARSERS[source.type](source))
+    fetch_started.reset(token)
+    waiter = asyncio.create_task(started.wait())
+    try:
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        if not task.done():
+            await asyncio.wait({task}, timeout=SOURCE_BUDGET)
+        if not task.done():
+            task.cancel()
+            logger.warning(f"⏱ {source.name}: не уложился в {SOURCE_BUDGET:.0f}с, отменён")
+            raise asyncio.TimeoutError()
+        return task.result()
+    except asyncio.CancelledError:
+        # Отмена по сроку цикла доходит и до разбора источника
+        task.cancel()
+        raise
+    finally:
+        waiter.cancel()
+
+
+async def collect_news() -> List[NewsItem]:
+    global deferred_sources
     all_news = []
     
-    logger.info(f"📰 Начало сбора новостей из {len(NEWS_SOURCES)} источников...")
+    logger.info(f"📰 Начало сбора новостей из {len(source_registry)} источников...")
     
-    tasks = []
-    for source in NEWS_SOURCES:
-        if source['type'] == 'rss':
-            tasks.append(parse_rss(source))
-        elif source['type'] == 'html':
-            tasks.append(parse_html(source))
+    active_sources = []
+    skipped = 0
+    foreign = 0
+    for source in source_registry:
+        # Сборщик обрабатывает только хосты своего шарда
+        if not owns_host(source.host):
+            foreign += 1
+            continue
+        # Отключённые автоматом источники пропускаем без запросов
+        if not replay_archive.replaying and not circuit_breakers.allow(source.name):
+            skipped += 1
+            continue
+        active_sources.append(source)
+    # Отложенные источники первыми получают слоты планировщика
+    active_sources.sort(key=lambda source: source.name not in deferred_sources)
+    
+    if skipped:
+        logger.info(f"🔌 Пропущено отключённых источников: {skipped}")
+    if foreign:
+        logger.info(f"🧭 Шард {SHARD_ID}: источников {len(active_sources) + skipped}, у других сборщиков {foreign}")
     
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    tasks = [asyncio.create_task(parse_with_budget(source)) for source in active_sources]
+    done, pending = await asyncio.wait(tasks, timeout=CYCLE_DEADLINE or None) if tasks else (set(), set())
     
-    for idx, result in enumerate(results):
-        if isinstance(result, list):
-            source_name = NEWS_SOURCES[idx]['name']
+    # Срок цикла истёк: собранное сохраняем, остальное отменяем и переносим
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending, timeout=5)
+    deferred_sources = {source.name for source, task in zip(active_sources, tasks) if task in pending}
+    if deferred_sources:
+        logger.warning(f"⏱ Срок сбора {CYCLE_DEADLINE:.0f}с истёк, перенесены на следующий цикл: {len(deferred_sources)} "
+                       f"({', '.join(sorted(deferred_sources)[:10])})")
+    
+    for source, task in zip(active_sources, tasks):
+        if task in pending:
+            continue
+        source_name = source.name
+        result = task.exception() or task.result()
+        if isinstance(result, Exception):
+            circuit_breakers.record_failure(source_name)
+        elif isinstance(result, list):
             if result:
                 logger.info(f"📰 {source_name}: собрано {len(result)} новостей")
                 for item in result[:2]:
-                    logger.info(f"   - {item['title'][:60]}...")
+                    logger.info(f"   - {item.title[:60]}...")
             all_news.extend(result)
     
     return all_news
 
-def format_post(news_item: Dict) -> str:
+def format_post(news_item: NewsItem) -> str:
     start_emoji = random.choice(EMOJIS['start'])
     
-    title = news_item.get('title', '').strip()
-    description = news_item.get('description', '').strip()
-    link = news_item.get('link', '')
+    title = news_item.title.strip()
+    description = news_item.description.strip()
+    link = news_item.link
     
     if not title:
         title = "Без заголовка"
+    # Длинный заголовок обрезаем так же, как описание, чтобы пост помещался в сообщение Telegram
+    if len(title) > 300:
+        title = title[:300].rsplit(' ', 1)[0] + "..."
     
     # Экранируем только HTML, но оставляем разметку для Telegram
     title_escaped = escape(title)
@@ -746,75 +954,122 @@ def format_post(news_item: Dict) -> str:
     
     return post
 
-async def publish_news(news_items: List[Dict]):
-    processed_urls = load_processed_urls()
-    published_count = 0
-    duplicates_count = 0
-    
-    logger.info(f"📋 Всего новостей для проверки: {len(news_items)}")
-    logger.info(f"📋 Загружено хешей из duplicates.txt: {len(processed_urls)}")
-    
-    for news_item in news_items:
-        url_hash = get_url_hash(news_item['link'])
-        
-        if url_hash in processed_urls:
-            duplicates_count += 1
-            if duplicates_count <= 3:  # Показываем первые 3 дубликата для отладки
-                logger.debug(f"🔄 Дубликат: {news_item['title'][:50]}... (URL: {news_item['link'][:50]})")
-            continue
-        
-        try:
-            post_text = format_post(news_item)
-            
-            await bot.send_message(
-                chat_id=PREVIEW_CHANNEL_ID,
-                text=post_text,
-                parse_mode=ParseMode.HTML,
-                disable_web_page_preview=False
-            )
-            
-            save_processed_url(url_hash)
-            processed_urls.add(url_hash)
-            published_count += 1
-            
-            logger.info(f"Опубликовано: {news_item['title'][:50]}... ({news_item['source']})")
-            
-            await asyncio.sleep(3)
-            
-        except Exception as e:
-            logger.error(f"Ошибка публикации новости: {e}")
-            await asyncio.sleep(5)
-    
-    logger.info(f"✅ Опубликовано: {published_count} | 🔄 Дубликатов: {duplicates_count} | 📊 Всего обработано: {len(news_items)}")
+async def publish_news(news_items: List[NewsItem]):
+    results = await publisher.publish(get_bot(), news_items)
+    per_channel = ', '.join(f"{chat_id}: {count}" for chat_id, count in results.items())
+    logger.info(f"✅ Опубликовано: {sum(results.values())} ({per_channel}) | 📊 Всего обработано: {len(news_items)}")
 
-async def news_cycle():
-    if STATIC_PROXY:
+async def gather_news() -> List[NewsItem]:
+    """Загружает и оценивает новости источников этого процесса"""
+    if replay_archive.replaying:
+        logger.info(f"📼 Воспроизведение цикла из {replay_archive.directory}")
+    elif STATIC_PROXY:
         logger.info(f"🔐 Используется статический прокси: {STATIC_PROXY.split('@')[-1] if '@' in STATIC_PROXY else STATIC_PROXY}")
     else:
-        load_proxy_pool()
+        await proxy_manager.ensure_fresh()
+    source_registry.reload_if_changed()
     logger.info("🔍 Начало сбора новостей...")
     news_items = await collect_news()
     logger.info(f"📊 Собрано новостей ВСЕГО: {len(news_items)}")
-    
-    if news_items:
-        await publish_news(news_items)
+    return news_items
+
+async def run_cycle():
+    cycle_started = time.monotonic()
+    outbox_id = 0
+    if BOT_ROLE == 'publisher':
+        # Публикатор ничего не загружает: новости приходят от сборщиков через очередь
+        outbox_id, news_items = await outbox.take()
+        if not news_items:
+            await outbox.ack(outbox_id)
+            logger.debug("📭 Очередь сборщиков пуста")
+            return
+        logger.info(f"📥 Получено из очереди сборщиков: {len(news_items)}")
     else:
-        logger.warning("⚠️ Не найдено релевантных новостей из всех источников!")
+        news_items = await gather_news()
+    cycle_profiler.phase('collect')
+
+    if BOT_ROLE == 'collector':
+        # Перевод, отбор лучших и проверка дубликатов — у единственного публикатора
+        await outbox.push(SHARD_ID, news_items)
+        # Для сборщика запись обработана, когда передана публикатору: дубликаты отсекает он
+        pushed = {item.url_hash for item in news_items}
+        feed_cursors.settle(pushed.__contains__)
+        cycle_profiler.phase('push')
+    else:
+        news_items = await news_pipeline.run(None, news_items)
+        if news_items:
+            await publish_news(news_items)
+        else:
+            logger.warning("⚠️ Не найдено релевантных новостей из всех источников!")
+        cycle_profiler.phase('publish')
 
+    for pipeline in (source_pipeline, news_pipeline):
+        logger.info(pipeline.summary())
+        pipeline.reset()
+    logger.info(body_cache.summary())
+    body_cache.reset()
+    logger.info(circuit_breakers.summary())
+    # Состояние боевого режима не трогаем при воспроизведении
+    if not replay_archive.replaying:
+        circuit_breakers.save()
+        fetch_strategies.save()
+        # Записи опубликованных новостей больше не перечитываются
+        feed_cursors.settle(publisher.is_published)
+        feed_cursors.save()
+        http_validators.save()
+        proxy_manager.save()
+        # Всё состояние цикла пишется одной транзакцией
+        await state_store.flush()
+    # Записи очереди удаляем, только когда опубликованные ссылки уже сохранены
+    await outbox.ack(outbox_id)
+    replay_archive.flush()
+    cycle_profiler.phase('save')
+    logger.info(f"⏱ Цикл занял {time.monotonic() - cycle_started:.1f}с")
+    if LOOP_WATCHDOG:
+        logger.info(loop_watchdog.summary())
+        loop_watchdog.reset()
     cleanup_logs()
 
+async def news_cycle():
+    # Профилирование включается PROFILE_CYCLES или сигналом SIGUSR1; иначе это только проверка флага
+    cycle_profiler.start()
+    try:
+        await run_cycle()
+    finally:
+        await cycle_profiler.finish()
+
 async def main():
     logger.info("Бот запущен и готов к работе!")
     logger.info(f"Проверка новостей каждые {CHECK_INTERVAL // 60} минут")
+    if BOT_ROLE:
+        logger.info(f"🧭 Роль процесса: {BOT_ROLE}{' ' + SHARD_ID if BOT_ROLE == 'collector' else ''}")
+    if LOOP_WATCHDOG:
+        loop_watchdog.start()
+    cycle_profiler.install_signal_handler()
     
     await news_cycle()
+    logger.info(import_report())
+    
+    if replay_archive.replaying:
+        logger.info(f"📼 Воспроизведение завершено, сообщений: {len(get_bot().sent)}")
+        return
     
+    # Публикатор проверяет очередь чаще, чем сборщики обходят источники
+    interval = OUTBOX_POLL_INTERVAL if BOT_ROLE == 'publisher' else CHECK_INTERVAL
     while True:
-        await asyncio.sleep(CHECK_INTERVAL)
+        await asyncio.sleep(interval)
         await news_cycle()
 
 if __name__ == "__main__":
+    if not replay_archive.replaying:
+        validate_config()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Бот остановлен")
+    finally:
+        scraper_pool.shutdown()
+        translator.shutdown()
+        if not replay_archive.replaying:
+            state_store.close()
+        outbox.close()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from config import OUTBOX_DB
+from items import NewsItem
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard TEXT NOT NULL,
+    item TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class Outbox:
+    """Очередь новостей от сборщиков к публикатору в общем файле SQLite (WAL)
+
+    Публикатор удаляет записи только после публикации: при сбое они будут прочитаны
+    повторно, а от двойной отправки защищает его список опубликованных ссылок.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+
+    def _connect(self, create: bool) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            # Файл пишут несколько процессов: ждём освобождения блокировки, а не падаем
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _push(self, shard: str, rows: List[str]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect(create=True)
+            with conn:
+                conn.executemany("INSERT INTO outbox (shard, item, created_at) VALUES (?, ?, ?)",
+                                 [(shard, row, now) for row in rows])
+
+    def _take(self) -> Tuple[int, List[str]]:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return 0, []
+            rows = conn.execute("SELECT id, item FROM outbox ORDER BY id").fetchall()
+        return (rows[-1][0] if rows else 0), [item for _, item in rows]
+
+    def _ack(self, last_id: int):
+        with self._lock:
+            conn = self._connect(create=True)
+            with conn:
+                conn.execute("DELETE FROM outbox WHERE id <= ?", (last_id,))
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def push(self, shard: str, news_items: List[NewsItem]):
+        """Сборщик кладёт новости цикла одной транзакцией"""
+        if news_items:
+            rows = [json.dumps(item.to_dict(), ensure_ascii=False) for item in news_items]
+            await self._run(self._push, shard, rows)
+        logger.info(f"📤 Шард {shard}: передано публикатору новостей: {len(news_items)}")
+
+    async def take(self) -> Tuple[int, List[NewsItem]]:
+        """Все ожидающие новости и номер последней записи для ack"""
+        last_id, rows = await self._run(self._take)
+        news_items = []
+        for row in rows:
+            try:
+                news_items.append(NewsItem.from_dict(json.loads(row)))
+            except (ValueError, KeyError) as e:
+                logger.error(f"❌ Повреждённая запись очереди пропущена: {e}")
+        return last_id, news_items
+
+    async def ack(self, last_id: int):
+        """Удаляет обработанные записи"""
+        if last_id:
+            await self._run(self._ack, last_id)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+outbox = Outbox(OUTBOX_DB)
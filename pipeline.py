@@ -0,0 +1,43 @@
+import inspect
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from items import NewsItem
+from registry import Source
+
+Stage = Callable[[Optional[Source], List[NewsItem]], Union[List[NewsItem], Awaitable[List[NewsItem]]]]
+
+
+class Pipeline:
+    """Общая обработка новостей: этапы идут по порядку над записями одного источника или всего цикла (source=None)"""
+
+    def __init__(self, stages: List[Tuple[str, Stage]], title: str = 'Этапы конвейера'):
+        self.title = title
+        self.stages = [(name, stage, inspect.iscoroutinefunction(stage)) for name, stage in stages]
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # Вызывается с именем этапа после его завершения (профилирование по этапам)
+        self.stage_hook: Optional[Callable[[str], None]] = None
+
+    async def run(self, source: Optional[Source], items: List[NewsItem]) -> List[NewsItem]:
+        for name, stage, is_async in self.stages:
+            if not items:
+                break
+            self.counts[name] = self.counts.get(name, 0) + len(items)
+            started = time.perf_counter()
+            items = await stage(source, items) if is_async else stage(source, items)
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+            if self.stage_hook:
+                self.stage_hook(name)
+        return items
+
+    def summary(self) -> str:
+        if not self.timings:
+            return f"🧩 {self.title}: не запускались"
+        # Асинхронные этапы источников идут параллельно, поэтому сумма может превышать длительность цикла
+        parts = [f"{name} {self.counts[name]} шт. {self.timings[name] * 1000:.0f} мс" for name, _, _ in self.stages if name in self.timings]
+        return f"🧩 {self.title}: {', '.join(parts)}"
+
+    def reset(self):
+        self.timings.clear()
+        self.counts.clear()
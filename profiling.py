@@ -0,0 +1,166 @@
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Optional
+
+from config import PROFILE_CYCLES, PROFILE_DIR, PROFILE_TOP
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Выделения самих профилировщиков и механизма импорта не относятся к работе бота
+ALLOC_EXCLUDE = {tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__}
+ALLOC_EXCLUDE_PREFIX = '<frozen importlib'
+
+
+def short_path(filename: str) -> str:
+    if filename.startswith(PROJECT_DIR):
+        return os.path.relpath(filename, PROJECT_DIR)
+    return os.path.basename(filename)
+
+
+class CycleProfiler:
+    """Профилирование цикла по запросу: cProfile по этапам и tracemalloc за цикл, отчёты в каталоге PROFILE_DIR
+
+    Вне профилируемого цикла вызовы сводятся к проверке флага. Профилируется
+    поток цикла событий: работа в пулах потоков видна только как ожидание.
+    На этапах снимаются только счётчики памяти; полный снимок выделений берётся
+    в конце цикла, а разбирается в отдельном потоке, чтобы не держать цикл событий.
+    """
+
+    def __init__(self, directory: str, cycles: int, top: int):
+        self.directory = directory
+        self.pending = max(0, cycles)
+        self.top = top
+        self.active = False
+        self._run_dir = ''
+        self._phase_index = 0
+        self._phase_started = 0.0
+        self._memory = 0
+        self._phases: List[str] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._stats: Optional[pstats.Stats] = None
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_time = 0.0
+        self._own_tracing = False
+
+    def request(self, cycles: int = 1):
+        self.pending += cycles
+        logger.info("🔬 Запрошено профилирование следующего цикла")
+
+    def install_signal_handler(self):
+        """SIGUSR1 включает профилирование следующего цикла (недоступно в Windows)"""
+        if not hasattr(signal, 'SIGUSR1'):
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.request)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    def start(self) -> bool:
+        if not self.pending or self.active:
+            return False
+        self.pending -= 1
+        self.active = True
+        self._run_dir = os.path.join(self.directory, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        os.makedirs(self._run_dir, exist_ok=True)
+        self._phase_index = 0
+        self._phases = []
+        self._stats = None
+        self._snapshot_time = 0.0
+        # Если память уже отслеживается (например, нагрузочным прогоном), не выключаем её в конце
+        self._own_tracing = not tracemalloc.is_tracing()
+        if self._own_tracing:
+            # Отслеживание начинается с нуля: начальный снимок был бы пустым
+            tracemalloc.start()
+            self._start_snapshot = None
+        else:
+            started = time.perf_counter()
+            self._start_snapshot = tracemalloc.take_snapshot()
+            self._snapshot_time += time.perf_counter() - started
+        self._memory = tracemalloc.get_traced_memory()[0]
+        logger.info(f"🔬 Профилирование цикла, отчёты в {self._run_dir}")
+        self._begin_phase()
+        return True
+
+    def _begin_phase(self):
+        tracemalloc.reset_peak()
+        self._phase_started = time.perf_counter()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def phase(self, name: str):
+        """Завершает текущий этап под именем name и начинает следующий"""
+        if not self.active:
+            return
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._phase_started
+        current, peak = tracemalloc.get_traced_memory()
+        self._phase_index += 1
+        self._profile.dump_stats(os.path.join(self._run_dir, f"{self._phase_index:02d}_{name}.prof"))
+        if self._stats is None:
+            self._stats = pstats.Stats(self._profile)
+        else:
+            self._stats.add(self._profile)
+        line = (f"Этап {name}: {elapsed * 1000:.0f} мс, память {(current - self._memory) / 1024:+.0f} КБ, "
+                f"пик {peak / (1024 * 1024):.1f} МБ")
+        self._phases.append(line)
+        logger.info(f"🔬 {line}")
+        self._memory = current
+        self._begin_phase()
+
+    def _write_allocations(self, snapshot: tracemalloc.Snapshot, path: str):
+        if self._start_snapshot is not None:
+            stats = snapshot.compare_to(self._start_snapshot, 'lineno')
+            rows = [(stat.size_diff, stat.count_diff, stat.traceback[0]) for stat in stats]
+        else:
+            rows = [(stat.size, stat.count, stat.traceback[0]) for stat in snapshot.statistics('lineno')]
+        # Фильтруем готовую статистику, а не сами трассы: так на порядок быстрее
+        rows = [row for row in rows if row[2].filename not in ALLOC_EXCLUDE
+                and not row[2].filename.startswith(ALLOC_EXCLUDE_PREFIX)]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self._phases) + '\n\nПрирост памяти за цикл по строкам кода:\n')
+            for size, count, frame in rows[:self.top]:
+                f.write(f"{size / 1024:+10.1f} КБ {count:+8d} блоков  {short_path(frame.filename)}:{frame.lineno}\n")
+
+    async def finish(self):
+        """Закрывает последний этап, сохраняет профиль и выделения памяти за цикл, пишет в лог самые затратные функции"""
+        if not self.active:
+            return
+        self.phase('finish')
+        self._profile.disable()
+        self._profile = None
+        peak = max(tracemalloc.get_traced_memory()[1], self._memory)
+        started = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot()
+        if self._own_tracing:
+            tracemalloc.stop()
+        self.active = False
+        allocations = os.path.join(self._run_dir, 'allocations.txt')
+        try:
+            await asyncio.to_thread(self._write_allocations, snapshot, allocations)
+        finally:
+            self._start_snapshot = None
+        self._snapshot_time += time.perf_counter() - started
+
+        self._stats.dump_stats(os.path.join(self._run_dir, 'cycle.prof'))
+        # (файл, строка, функция) -> (примитивные вызовы, вызовы, собственное время, общее время, вызывающие)
+        hot = sorted(self._stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        lines = [
+            f"  {tottime * 1000:8.0f} мс собств. {cumtime * 1000:8.0f} мс всего {calls:>8} выз.  "
+            f"{func} ({short_path(filename)}:{lineno})"
+            for (filename, lineno, func), (_, calls, tottime, cumtime, _) in hot
+        ]
+        logger.info(f"🔬 Самые затратные функции цикла (пик памяти {peak / (1024 * 1024):.1f} МБ):\n" + '\n'.join(lines))
+        logger.info(f"🔬 Снимки памяти заняли {self._snapshot_time * 1000:.0f} мс (не входят во время этапов), "
+                    f"выделения — в {allocations}")
+        logger.info(f"🔬 Профиль цикла сохранён в {self._run_dir} (python -m pstats {os.path.join(self._run_dir, 'cycle.prof')})")
+
+
+cycle_profiler = CycleProfiler(PROFILE_DIR, PROFILE_CYCLES, PROFILE_TOP)
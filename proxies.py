@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+from backends import backend
+from statestore import state_store
+from config import (
+    PROXY_SOURCE_URL,
+    PROXY_CHECK_URL,
+    PROXY_REFRESH_INTERVAL,
+    PROXY_PROBE_TIMEOUT,
+    PROXY_PROBE_CONCURRENCY,
+    PROXY_PROBE_LIMIT,
+    PROXY_MAX_FAILURES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_proxy(proxy: str) -> str:
+    proxy = proxy.strip()
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    return proxy
+
+
+class ProxyStats:
+    """Статистика одного прокси: задержка (скользящее среднее) и доля успехов"""
+
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.latency: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def to_dict(self) -> Dict:
+        return {'latency': self.latency, 'successes': self.successes, 'failures': self.failures}
+
+    @classmethod
+    def from_dict(cls, proxy: str, data: Dict) -> 'ProxyStats':
+        stats = cls(proxy)
+        stats.latency = data.get('latency')
+        stats.successes = data.get('successes', 0)
+        stats.failures = data.get('failures', 0)
+        return stats
+
+    def record(self, ok: bool, latency: Optional[float] = None):
+        if ok:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if latency is not None:
+                self.latency = latency if self.latency is None else self.latency * 0.7 + latency * 0.3
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    @property
+    def success_rate(self) -> float:
+        # Сглаживание Лапласа, чтобы один запрос не давал 0% или 100%
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def score(self) -> float:
+        latency = self.latency if self.latency is not None else PROXY_PROBE_TIMEOUT
+        return self.success_rate / max(latency, 0.05)
+
+    @property
+    def healthy(self) -> bool:
+        return self.successes > 0 and self.consecutive_failures < PROXY_MAX_FAILURES
+
+
+class ProxyManager:
+    """Асинхронный пул прокси: периодическое обновление, проверка и выбор лучшего"""
+
+    def __init__(self, source_url: str, check_url: str, refresh_interval: int):
+        self.source_url = source_url
+        self.check_url = check_url
+        self.refresh_interval = refresh_interval
+        # Проверенный пул переживает перезапуск; время обновления — по настенным часам
+        saved = state_store.load('proxies')
+        self.stats: Dict[str, ProxyStats] = {
+            proxy: ProxyStats.from_dict(proxy, data) for proxy, data in saved.get('stats', {}).items()
+        }
+        self.last_refresh = saved.get('refreshed_at', 0.0)
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _fetch_list(self) -> List[str]:
+        async with backend('httpx').AsyncClient(timeout=10.0) as client:
+            response = await client.get(self.source_url)
+        if response.status_code != 200:
+            logger.warning(f"⚠️ Не удалось загрузить прокси, статус {response.status_code}")
+            return []
+        return [normalize_proxy(line) for line in response.text.splitlines() if line.strip()]
+
+    async def probe(self, proxy: str) -> bool:
+        stats = self.stats.setdefault(proxy, ProxyStats(proxy))
+        started = time.monotonic()
+        try:
+            async with backend('httpx').AsyncClient(proxy=proxy, timeout=PROXY_PROBE_TIMEOUT, verify=False) as client:
+                response = await client.get(self.check_url)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        stats.record(ok, time.monotonic() - started)
+        return ok
+
+    async def refresh(self):
+        """Обновляет список, проверяет прокси параллельно и удаляет неработающие"""
+        if not self.source_url:
+            return
+        try:
+            proxies = await self._fetch_list()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка загрузки списка прокси: {e}")
+            proxies = []
+        self.last_refresh = time.time()
+
+        # Проверяем уже известные прокси и ограниченную выборку новых
+        known = [proxy for proxy in self.stats if proxy in proxies or self.stats[proxy].healthy]
+        fresh = [proxy for proxy in proxies if proxy not in self.stats]
+        random.shuffle(fresh)
+        candidates = known + fresh[:max(0, PROXY_PROBE_LIMIT - len(known))]
+
+        semaphore = asyncio.Semaphore(PROXY_PROBE_CONCURRENCY)
+
+        async def limited_probe(proxy: str):
+            async with semaphore:
+                await self.probe(proxy)
+
+        await asyncio.gather(*(limited_probe(proxy) for proxy in candidates))
+        self.evict()
+        logger.info(f"🌐 Прокси: загружено {len(proxies)}, проверено {len(candidates)}, рабочих {len(self.stats)}")
+
+    def evict(self):
+        for proxy in [proxy for proxy, stats in self.stats.items() if not stats.healthy]:
+            del self.stats[proxy]
+
+    async def ensure_fresh(self):
+        """Обновляет пул, если он пуст или устарел"""
+        if not self.source_url:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.stats and time.time() - self.last_refresh < self.refresh_interval:
+                return
+            await self.refresh()
+
+    def save(self):
+        state_store.put('proxies', {
+            'refreshed_at': self.last_refresh,
+            'stats': {proxy: stats.to_dict() for proxy, stats in self.stats.items()},
+        })
+
+    def best(self) -> Optional[str]:
+        """Возвращает самый быстрый из рабочих прокси"""
+        healthy = [stats for stats in self.stats.values() if stats.healthy]
+        if not healthy:
+            return None
+        return max(healthy, key=lambda stats: stats.score).proxy
+
+    def report(self, proxy: Optional[str], ok: bool, latency: Optional[float] = None):
+        """Учитывает результат реального запроса через прокси"""
+        if not proxy or proxy not in self.stats:
+            return
+        stats = self.stats[proxy]
+        stats.record(ok, latency)
+        if not stats.healthy:
+            del self.stats[proxy]
+            logger.debug(f"🌐 Прокси исключён из пула: {proxy}")
+
+
+proxy_manager = ProxyManager(PROXY_SOURCE_URL, PROXY_CHECK_URL, PROXY_REFRESH_INTERVAL)
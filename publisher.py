@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import re
+from html import escape
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import (
+    DUPLICATES_FILE,
+    PREVIEW_CHANNEL_ID,
+    PUBLISH_CHANNELS,
+    PUBLISH_INTERVAL,
+    PUBLISH_GLOBAL_RATE,
+    DIGEST_MODE,
+    DIGEST_MIN_ITEMS,
+)
+from items import NewsItem
+from replay import replay_archive
+from scheduler import TokenBucket
+from statestore import state_store
+from textutil import html_to_text
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+DIGEST_SEPARATOR = "\n\n"
+DIGEST_DEFAULT_GROUP = "#новости"
+
+
+def duplicates_file_for(chat_id: str) -> str:
+    """Прежний файл дубликатов канала, из которого переносится история"""
+    if chat_id == PREVIEW_CHANNEL_ID:
+        return DUPLICATES_FILE
+    return f"duplicates_{re.sub(r'[^0-9A-Za-z_-]', '_', chat_id)}.txt"
+
+
+def digest_group(news_item: NewsItem, mode: str) -> str:
+    if mode == 'hashtag':
+        return news_item.hashtags[0] if news_item.hashtags else DIGEST_DEFAULT_GROUP
+    return f"📰 <b>{escape(news_item.source)}</b>"
+
+
+def fit_post(post: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> str:
+    """Пост длиннее limit нельзя обрезать как есть (разорвётся разметка) — отправляем его простым текстом"""
+    if len(post) <= limit:
+        return post
+    text = html_to_text(post)[:limit - 3]
+    while len(escape(text)) > limit - 3:
+        text = text[:-100]
+    return escape(text) + "..."
+
+
+def pack_digest(entries: List[Tuple[str, str, str]], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[Tuple[str, List[str]]]:
+    """Упаковывает посты (группа, хеш, текст) в сообщения не длиннее limit; заголовок группы повторяется в новом сообщении"""
+    messages = []
+    parts: List[str] = []
+    hashes: List[str] = []
+    size = 0
+    last_group = None
+    for group, url_hash, post in entries:
+        if len(group) + len(DIGEST_SEPARATOR) + len(post) > limit:
+            # Пост не помещается в дайджест даже один — отправляем его отдельным сообщением без заголовка группы
+            if parts:
+                messages.append((DIGEST_SEPARATOR.join(parts), hashes))
+                parts, hashes = [], []
+                size = 0
+            messages.append((fit_post(post, limit), [url_hash]))
+            last_group = None
+            continue
+        piece = post if group == last_group else f"{group}{DIGEST_SEPARATOR}{post}"
+        added = len(piece) + (len(DIGEST_SEPARATOR) if parts else 0)
+        if parts and size + added > limit:
+            messages.append((DIGEST_SEPARATOR.join(parts), hashes))
+            parts, hashes = [], []
+            piece = f"{group}{DIGEST_SEPARATOR}{post}"
+            added = len(piece)
+            size = 0
+        parts.append(piece)
+        hashes.append(url_hash)
+        size += added
+        last_group = group
+    if parts:
+        messages.append((DIGEST_SEPARATOR.join(parts), hashes))
+    return messages
+
+
+class Channel:
+    """Канал публикации: свой темп отправки и свой список опубликованных ссылок"""
+
+    def __init__(self, chat_id: str, interval: float):
+        self.chat_id = chat_id
+        self.duplicates_file = duplicates_file_for(chat_id)
+        self.bucket = TokenBucket(1 / interval, 1) if interval > 0 else None
+        self._published: Optional[Set[str]] = None
+
+    @property
+    def published(self) -> Set[str]:
+        if self._published is None:
+            # При воспроизведении дубликаты не читаются и не пишутся, чтобы прогоны были одинаковыми
+            self._published = set() if replay_archive.replaying else state_store.load_published(self.chat_id, self.duplicates_file)
+        return self._published
+
+    def mark_published(self, url_hash: str):
+        self.published.add(url_hash)
+        if not replay_archive.replaying:
+            state_store.add_published(self.chat_id, url_hash)
+
+
+class Publisher:
+    """Рассылает новости во все каналы параллельно; каждый пост форматируется один раз"""
+
+    def __init__(self, chat_ids: List[str], interval: float, global_rate: float, digest_mode: str = '', digest_min_items: int = 0):
+        self.channels = [Channel(chat_id, interval) for chat_id in chat_ids]
+        self.digest_mode = digest_mode
+        self.digest_min_items = digest_min_items
+        # Общий лимит Telegram на бота, независимо от числа каналов
+        self.global_bucket = TokenBucket(global_rate, 1) if global_rate > 0 else None
+
+    async def _send(self, bot, channel: Channel, text: str, preview: bool = True):
+        if not replay_archive.replaying:
+            if channel.bucket:
+                await channel.bucket.acquire()
+            if self.global_bucket:
+                await self.global_bucket.acquire()
+        await bot.send_message(
+            chat_id=channel.chat_id,
+            text=text,
+            parse_mode='HTML',
+            disable_web_page_preview=not preview
+        )
+
+    def is_published(self, url_hash: str) -> bool:
+        """Новость уже есть во всех каналах"""
+        return bool(self.channels) and all(url_hash in channel.published for channel in self.channels)
+
+    async def _publish_to(self, bot, channel: Channel, queue: List[NewsItem]) -> int:
+        published_count = 0
+        for news_item in queue:
+            if news_item.url_hash in channel.published:
+                continue
+            try:
+                await self._send(bot, channel, fit_post(news_item.text))
+                channel.mark_published(news_item.url_hash)
+                published_count += 1
+                logger.info(f"Опубликовано в {channel.chat_id}: {news_item.title[:50]}... ({news_item.source})")
+            except Exception as e:
+                logger.error(f"Ошибка публикации новости в {channel.chat_id}: {e}")
+                # Telegram сообщает, сколько ждать при превышении лимита
+                await asyncio.sleep(getattr(e, 'retry_after', None) or 5)
+        return published_count
+
+    async def _publish_digest_to(self, bot, channel: Channel, queue: List[NewsItem]) -> int:
+        entries = []
+        for news_item in queue:
+            if news_item.url_hash in channel.published:
+                continue
+            post = f"{news_item.text}\n{' '.join(news_item.hashtags)}" if news_item.hashtags else news_item.text
+            entries.append((digest_group(news_item, self.digest_mode), news_item.url_hash, post))
+        published_count = 0
+        for text, hashes in pack_digest(entries):
+            try:
+                # Превью показало бы только первую ссылку дайджеста
+                await self._send(bot, channel, text, preview=False)
+                for url_hash in hashes:
+                    channel.mark_published(url_hash)
+                published_count += len(hashes)
+                logger.info(f"Опубликован дайджест в {channel.chat_id}: {len(hashes)} новостей, {len(text)} символов")
+            except Exception as e:
+                logger.error(f"Ошибка публикации дайджеста в {channel.chat_id}: {e}")
+                await asyncio.sleep(getattr(e, 'retry_after', None) or 5)
+        return published_count
+
+    async def publish(self, bot, news_items: List[NewsItem]) -> Dict[str, int]:
+        """Публикует готовые посты во все каналы, возвращает число опубликованных новостей по каналам"""
+        queue = []
+        queued: Set[str] = set()
+        duplicates_count = 0
+        for news_item in news_items:
+            if news_item.url_hash in queued:
+                continue
+            if self.is_published(news_item.url_hash):
+                duplicates_count += 1
+                if duplicates_count <= 3:  # Показываем первые 3 дубликата для отладки
+                    logger.debug(f"🔄 Дубликат: {news_item.title[:50]}... (URL: {news_item.link[:50]})")
+                continue
+            queued.add(news_item.url_hash)
+            queue.append(news_item)
+
+        digest = bool(self.digest_mode) and len(queue) >= self.digest_min_items
+        if digest:
+            # Посты одной группы идут подряд, группы — в порядке первого появления
+            groups: Dict[str, List[NewsItem]] = {}
+            for news_item in queue:
+                groups.setdefault(digest_group(news_item, self.digest_mode), []).append(news_item)
+            queue = [news_item for group in groups.values() for news_item in group]
+
+        logger.info(f"📋 Всего новостей для проверки: {len(news_items)}, новых: {len(queue)}, "
+                    f"дубликатов: {duplicates_count}, каналов: {len(self.channels)}"
+                    f"{', дайджест по ' + self.digest_mode if digest else ''}")
+        publish_to = self._publish_digest_to if digest else self._publish_to
+        results = await asyncio.gather(*(publish_to(bot, channel, queue) for channel in self.channels))
+        return {channel.chat_id: count for channel, count in zip(self.channels, results)}
+
+
+# Воспроизведение без настроенных каналов всё равно собирает сообщения в заглушку бота
+publisher = Publisher(
+    PUBLISH_CHANNELS or (['replay'] if replay_archive.replaying else []),
+    PUBLISH_INTERVAL,
+    PUBLISH_GLOBAL_RATE,
+    DIGEST_MODE,
+    DIGEST_MIN_ITEMS,
+)
@@ -0,0 +1,187 @@
+import codecs
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
+
+from config import SOURCES_FILE
+from backends import backend
+from scheduler import get_host
+from strategy import FETCH_TIERS
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TYPES = ('rss', 'html')
+HTML_REQUIRED = ('selector', 'title_selector', 'link_selector')
+SOURCE_KEYS = {
+    'name', 'type', 'url', 'always_include', 'use_proxy', 'render_js', 'render_wait', 'encoding', 'priority',
+    'selector', 'title_selector', 'link_selector', 'description_selector',
+}
+
+
+class SourceError(ValueError):
+    """Описание источника не прошло проверку"""
+
+
+def text_field(data: Dict, key: str) -> str:
+    """Строковое поле описания; отсутствующее или null — пустая строка"""
+    value = data.get(key)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise SourceError(f"поле {key} должно быть строкой, указано {type(value).__name__}")
+    return value.strip()
+
+
+class Source:
+    """Проверенный источник с заранее подготовленным планом загрузки и разбора"""
+
+    __slots__ = (
+        'name', 'type', 'url', 'host', 'always_include', 'use_proxy', 'render_js', 'render_wait', 'encoding',
+        'priority', 'tiers', 'selector', 'title_selector', 'link_selector', 'description_selector',
+    )
+
+    def __init__(self, data: Dict):
+        unknown = set(data) - SOURCE_KEYS
+        if unknown:
+            logger.warning(f"⚠️ Источник {data.get('name')}: неизвестные поля {', '.join(sorted(unknown))}")
+        self.name = text_field(data, 'name')
+        self.type = text_field(data, 'type')
+        self.url = text_field(data, 'url')
+        if not self.name:
+            raise SourceError("не указано имя")
+        if self.type not in SOURCE_TYPES:
+            raise SourceError(f"неизвестный тип {self.type!r} (допустимо: {', '.join(SOURCE_TYPES)})")
+        if not self.url.startswith(('http://', 'https://')):
+            raise SourceError(f"некорректный URL {self.url!r}")
+        self.host = get_host(self.url)
+        self.always_include = bool(data.get('always_include', False))
+        self.use_proxy = bool(data.get('use_proxy', False))
+        self.render_js = bool(data.get('render_js', False))
+        self.render_wait = float(data.get('render_wait', 1))
+        # Множитель оценки новостей источника при отборе лучших за цикл
+        self.priority = float(data.get('priority', 1))
+        if self.priority <= 0:
+            raise SourceError(f"приоритет должен быть больше нуля, указано {self.priority}")
+        self.encoding = text_field(data, 'encoding') or None
+        if self.encoding:
+            try:
+                self.encoding = codecs.lookup(self.encoding).name
+            except LookupError:
+                raise SourceError(f"неизвестная кодировка {self.encoding!r}") from None
+        # Playwright пробуем только для источников, которым нужен JavaScript
+        self.tiers = list(FETCH_TIERS if self.render_js else FETCH_TIERS[:-1])
+
+        self.selector = self.title_selector = self.link_selector = self.description_selector = None
+        if self.type == 'html':
+            selectors = {key: text_field(data, key) for key in HTML_REQUIRED + ('description_selector',)}
+            missing = [key for key in HTML_REQUIRED if not selectors[key]]
+            if missing:
+                raise SourceError(f"для HTML не хватает полей {', '.join(missing)}")
+            soupsieve = backend('soupsieve')
+            for key, selector in selectors.items():
+                if selector:
+                    try:
+                        setattr(self, key, soupsieve.compile(selector))
+                    except soupsieve.SelectorSyntaxError as e:
+                        raise SourceError(f"ошибка в {key}: {str(e).splitlines()[0]}") from None
+
+    def __repr__(self) -> str:
+        return f"Source({self.name!r}, {self.type!r}, {self.url!r})"
+
+
+def compile_sources(raw_sources: List[Dict]) -> List[Source]:
+    """Проверяет описания источников; ошибочные и повторяющиеся пропускаются с сообщением в логе"""
+    sources = []
+    names = set()
+    for idx, data in enumerate(raw_sources):
+        try:
+            if not isinstance(data, dict):
+                raise SourceError("ожидается объект")
+            source = Source(data)
+            if source.name in names:
+                raise SourceError("имя уже используется другим источником")
+        except Exception as e:
+            # Ошибка в одном описании не должна ронять загрузку остальных источников
+            name = data.get('name', '?') if isinstance(data, dict) else '?'
+            logger.error(f"❌ Источник #{idx + 1} ({name}) пропущен: {e}")
+            continue
+        names.add(source.name)
+        sources.append(source)
+    return sources
+
+
+class SourceRegistry:
+    """Список источников: из sources.py или из файла SOURCES_FILE с перечитыванием при изменении"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sources: Optional[List[Source]] = None
+        self._mtime: Optional[float] = None
+
+    @property
+    def sources(self) -> List[Source]:
+        if self._sources is None:
+            self.load()
+        return self._sources
+
+    def __iter__(self) -> Iterator[Source]:
+        return iter(self.sources)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def _read_file(self) -> List[Dict]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('sources', [])
+        if not isinstance(data, list):
+            raise ValueError("ожидается список источников")
+        return data
+
+    def load(self):
+        if not self.path:
+            from sources import NEWS_SOURCES
+            self.replace(NEWS_SOURCES)
+            return
+        try:
+            self._mtime = os.stat(self.path).st_mtime
+            raw_sources = self._read_file()
+        except (OSError, ValueError) as e:
+            if self._sources is None:
+                raise
+            logger.error(f"❌ Не удалось перечитать {self.path}, остаются прежние источники: {e}")
+            return
+        try:
+            sources = compile_sources(raw_sources)
+        except Exception as e:
+            if self._sources is None:
+                raise
+            logger.error(f"❌ Не удалось проверить источники из {self.path}, остаются прежние: {e}")
+            return
+        if raw_sources and not sources and self._sources:
+            logger.error(f"❌ В {self.path} нет ни одного корректного источника, остаются прежние")
+            return
+        self._sources = sources
+        logger.info(f"📚 Загружено источников: {len(sources)} из {self.path}")
+
+    def replace(self, raw_sources: List[Dict]):
+        self._sources = compile_sources(raw_sources)
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает файл источников, если он изменился с прошлой загрузки"""
+        if not self.path or self._sources is None:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        logger.info(f"🔄 Файл источников {self.path} изменён, перечитываем")
+        self.load()
+        return True
+
+
+source_registry = SourceRegistry(SOURCES_FILE)
@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import REPLAY_MODE, REPLAY_DIR
+from storage import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayArchive:
+    """Запись ответов источников на диск и воспроизведение без сети
+
+    REPLAY_MODE=record — обычная работа, ответы и переводы сохраняются в REPLAY_DIR;
+    REPLAY_MODE=replay — ответы, переводы берутся из архива, публикация заглушена.
+    """
+
+    def __init__(self, mode: str, directory: str):
+        self.mode = mode
+        self.directory = directory
+        self.recording = mode == 'record'
+        self.replaying = mode == 'replay'
+        self._translations: Optional[Dict[str, str]] = None
+
+    def _path(self, source, suffix: str) -> str:
+        key = hashlib.sha1(f"{source.name}|{source.url}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def save(self, source, body: bytes, charset: Optional[str] = None):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(source, '.body'), 'wb') as f:
+            f.write(body)
+        save_json(self._path(source, '.json'), {
+            'name': source.name,
+            'url': source.url,
+            'charset': charset,
+            'size': len(body),
+            'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+    def load(self, source) -> Optional[Tuple[bytes, Optional[str]]]:
+        meta = load_json(self._path(source, '.json'))
+        try:
+            with open(self._path(source, '.body'), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            logger.warning(f"📼 {source.name}: нет записи в архиве {self.directory}")
+            return None
+        return body, meta.get('charset')
+
+    def _translations_path(self) -> str:
+        return os.path.join(self.directory, 'translations.json')
+
+    def _get_translations(self) -> Dict[str, str]:
+        if self._translations is None:
+            self._translations = load_json(self._translations_path())
+        return self._translations
+
+    @staticmethod
+    def _translation_key(text: str, lang: str) -> str:
+        return hashlib.sha1(f"{lang}|{text}".encode('utf-8')).hexdigest()
+
+    def save_translation(self, text: str, lang: str, translated: str):
+        self._get_translations()[self._translation_key(text, lang)] = translated
+
+    def load_translation(self, text: str, lang: str) -> str:
+        return self._get_translations().get(self._translation_key(text, lang), text)
+
+    def flush(self):
+        if self.recording and self._translations is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            save_json(self._translations_path(), self._translations)
+
+
+class ReplayBot:
+    """Заглушка Telegram-бота: сообщения только собираются в память"""
+
+    def __init__(self):
+        self.sent: List[Dict] = []
+
+    async def send_message(self, chat_id, text: str, **kwargs):
+        self.sent.append({'chat_id': chat_id, 'text': text})
+        logger.debug(f"📼 Сообщение в {chat_id}: {text[:60]}...")
+
+
+replay_archive = ReplayArchive(REPLAY_MODE, REPLAY_DIR)
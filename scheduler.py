@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from config import (
+    MAX_CONCURRENT_FETCHES,
+    HOST_RATE_LIMIT,
+    HOST_BURST,
+    RETRY_AFTER_DEFAULT,
+    RETRY_AFTER_MAX,
+)
+
+logger = logging.getLogger(__name__)
+
+# Событие «источник получил первый слот»: от него отсчитывается бюджет времени источника
+fetch_started: ContextVar[Optional[asyncio.Event]] = ContextVar('fetch_started', default=None)
+
+
+def get_host(url: str) -> str:
+    host = (urlparse(url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Ведро токенов: не более rate запросов в секунду с запасом burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FetchScheduler:
+    """Общий планировщик загрузок: глобальный лимит, вежливость к хостам и Retry-After"""
+
+    def __init__(self, max_concurrent: int, host_rate: float, host_burst: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Семафор привязан к циклу событий, поэтому пересоздаём его при смене цикла
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+        return self._semaphore
+
+    def _get_bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.host_rate, self.host_burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    async def _wait_host(self, host: str):
+        while True:
+            delay = self._blocked_until.get(host, 0) - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        if self.host_rate > 0:
+            await self._get_bucket(host).acquire()
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Ожидает разрешения на запрос к url и занимает глобальный слот"""
+        host = get_host(url)
+        # Сначала ждём хост, чтобы не держать глобальный слот во время паузы
+        await self._wait_host(host)
+        async with self._get_semaphore():
+            started = fetch_started.get()
+            if started is not None:
+                started.set()
+            yield
+
+    def register_retry_after(self, url: str, header: Optional[str] = None) -> float:
+        """Блокирует хост после HTTP 429 для всех источников; возвращает паузу в секундах"""
+        host = get_host(url)
+        delay = parse_retry_after(header)
+        if delay is None:
+            delay = RETRY_AFTER_DEFAULT
+        delay = min(delay, RETRY_AFTER_MAX)
+        blocked_until = time.monotonic() + delay
+        if blocked_until > self._blocked_until.get(host, 0):
+            self._blocked_until[host] = blocked_until
+            logger.info(f"⏳ {host}: пауза {delay:.0f}с по Retry-After")
+        return delay
+
+
+fetch_scheduler = FetchScheduler(MAX_CONCURRENT_FETCHES, HOST_RATE_LIMIT, HOST_BURST)
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from backends import backend
+from config import CLOUDSCRAPER_WORKERS, CLOUDSCRAPER_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class ScraperPool:
+    """Асинхронная обёртка над cloudscraper: запросы идут в отдельном пуле потоков
+
+    Каждый поток держит свою сессию (requests.Session не потокобезопасна),
+    поэтому cookies прохождения защиты переиспользуются между источниками.
+    """
+
+    def __init__(self, max_workers: int, timeout: float):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='cloudscraper')
+        return self._executor
+
+    def _session(self):
+        scraper = getattr(self._local, 'scraper', None)
+        if scraper is None:
+            scraper = backend('cloudscraper').create_scraper(
+                browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True}
+            )
+            self._local.scraper = scraper
+        return scraper
+
+    def _get(self, url: str, proxy: Optional[str]):
+        proxies = {'http': proxy, 'https': proxy} if proxy else None
+        return self._session().get(url, timeout=self.timeout, proxies=proxies)
+
+    async def get(self, url: str, proxy: Optional[str] = None):
+        """Выполняет GET, не блокируя цикл событий
+
+        При отмене корутина завершается сразу; поток освободится сам
+        не позже чем через timeout секунд.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), self._get, url, proxy)
+        # Запас на случай, если requests не уложится в свой таймаут (медленное чтение тела)
+        return await asyncio.wait_for(future, self.timeout * 2)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+scraper_pool = ScraperPool(CLOUDSCRAPER_WORKERS, CLOUDSCRAPER_TIMEOUT)
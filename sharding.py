@@ -0,0 +1,42 @@
+import bisect
+import hashlib
+from typing import List, Optional
+
+from config import BOT_ROLE, SHARDS, SHARD_ID
+
+# Точек на кольце у каждого шарда: больше точек — ровнее распределение источников
+RING_REPLICAS = 100
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Согласованное хеширование: при добавлении или удалении шарда переезжает лишь часть источников"""
+
+    def __init__(self, nodes: List[str], replicas: int = RING_REPLICAS):
+        self.nodes = list(nodes)
+        points = sorted((ring_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        idx = bisect.bisect(self._hashes, ring_hash(key)) % len(self._hashes)
+        return self._owners[idx]
+
+
+shard_ring = HashRing(SHARDS)
+
+
+def owns_host(host: str) -> bool:
+    """Хост относится к шарду этого сборщика; вне режима сборщика — все хосты
+
+    Делим по хосту, а не по источнику: лимиты запросов к хосту действуют внутри
+    одного процесса и при таком делении не превышаются.
+    """
+    if BOT_ROLE != 'collector' or not SHARDS:
+        return True
+    return shard_ring.node_for(host) == SHARD_ID
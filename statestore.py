@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import STATE_DB, TRANSLATION_CACHE_DAYS
+from storage import load_json
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS published (
+    channel TEXT NOT NULL,
+    url_hash TEXT NOT NULL,
+    published_at REAL NOT NULL,
+    PRIMARY KEY (channel, url_hash)
+);
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    used_at REAL NOT NULL
+);
+"""
+
+
+class StateStore:
+    """Состояние бота в SQLite (WAL): изменения копятся в памяти и пишутся одной транзакцией в конце цикла
+
+    Файл базы создаётся при первой записи; пока его нет, состояние переносится из прежних JSON/TXT файлов.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='statestore')
+        self._pending_state: Dict[str, Dict[str, Any]] = {}
+        self._pending_published: List[Tuple[str, str, float]] = []
+        self._pending_translations: Dict[str, str] = {}
+
+    def _connect(self, create: bool) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            conn = self._connect(create=False)
+            return conn.execute(sql, params).fetchall() if conn else []
+
+    def load(self, namespace: str, legacy_path: str = '') -> Dict[str, Any]:
+        """Читает раздел состояния; при пустой базе переносит данные из старого JSON-файла"""
+        rows = self._query("SELECT key, value FROM state WHERE namespace = ?", (namespace,))
+        if rows:
+            return {key: json.loads(value) for key, value in rows}
+        data = load_json(legacy_path) if legacy_path else {}
+        if data:
+            logger.info(f"🗄 {namespace}: перенос {len(data)} записей из {legacy_path}")
+            self._pending_state[namespace] = data
+        return data
+
+    def put(self, namespace: str, data: Dict[str, Any]):
+        """Запоминает снимок раздела; в базу он попадёт при flush"""
+        self._pending_state[namespace] = data
+
+    def load_published(self, channel: str, legacy_path: str = '') -> Set[str]:
+        rows = self._query("SELECT url_hash FROM published WHERE channel = ?", (channel,))
+        if rows:
+            return {url_hash for url_hash, in rows}
+        published = set()
+        if legacy_path:
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    published = set(line.strip() for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+        if published:
+            logger.info(f"🗄 {channel}: перенос {len(published)} опубликованных ссылок из {legacy_path}")
+            now = time.time()
+            self._pending_published.extend((channel, url_hash, now) for url_hash in published)
+        return published
+
+    def add_published(self, channel: str, url_hash: str):
+        self._pending_published.append((channel, url_hash, time.time()))
+
+    async def get_translations(self, keys: List[str]) -> Dict[str, str]:
+        """Переводы из кэша по ключам; ещё не записанные берутся из памяти"""
+        found = {key: self._pending_translations[key] for key in keys if key in self._pending_translations}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            placeholders = ', '.join('?' * len(missing))
+            rows = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._query,
+                f"SELECT key, text FROM translations WHERE key IN ({placeholders})", tuple(missing),
+            )
+            found.update(rows)
+        return found
+
+    def add_translation(self, key: str, text: str):
+        self._pending_translations[key] = text
+
+    def _take_batch(self) -> Optional[Tuple]:
+        if not (self._pending_state or self._pending_published or self._pending_translations):
+            return None
+        # Сериализуем в потоке цикла событий, пока данные не меняются
+        state_rows = {
+            namespace: [(namespace, key, json.dumps(value, ensure_ascii=False)) for key, value in data.items()]
+            for namespace, data in self._pending_state.items()
+        }
+        batch = (state_rows, self._pending_published, list(self._pending_translations.items()))
+        self._pending_state = {}
+        self._pending_published = []
+        self._pending_translations = {}
+        return batch
+
+    def _write(self, batch: Tuple):
+        state_rows, published, translations = batch
+        started = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            conn = self._connect(create=True)
+            with conn:
+                for namespace, rows in state_rows.items():
+                    conn.execute("DELETE FROM state WHERE namespace = ?", (namespace,))
+                    conn.executemany("INSERT INTO state (namespace, key, value) VALUES (?, ?, ?)", rows)
+                conn.executemany("INSERT OR IGNORE INTO published (channel, url_hash, published_at) VALUES (?, ?, ?)", published)
+                conn.executemany("INSERT OR REPLACE INTO translations (key, text, used_at) VALUES (?, ?, ?)",
+                                 [(key, text, now) for key, text in translations])
+                if TRANSLATION_CACHE_DAYS:
+                    conn.execute("DELETE FROM translations WHERE used_at < ?", (now - TRANSLATION_CACHE_DAYS * 86400,))
+        logger.debug(f"🗄 Состояние записано за {(time.perf_counter() - started) * 1000:.0f} мс: "
+                     f"разделов {len(state_rows)}, ссылок {len(published)}, переводов {len(translations)}")
+
+    async def flush(self):
+        """Записывает накопленные изменения одной транзакцией, не блокируя цикл событий"""
+        batch = self._take_batch()
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch)
+
+    def close(self):
+        batch = self._take_batch()
+        if batch:
+            self._write(batch)
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+state_store = StateStore(STATE_DB)
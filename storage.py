@@ -0,0 +1,28 @@
+import json
+import logging
+import os
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+def load_json(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Не удалось прочитать {path}: {e}")
+        return {}
+
+
+def save_json(path: str, data: Dict):
+    # Пишем во временный файл и атомарно заменяем, чтобы не оставить битый JSON
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Не удалось сохранить {path}: {e}")
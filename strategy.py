@@ -0,0 +1,45 @@
+import logging
+from typing import Dict, List
+
+from config import FETCH_STRATEGY_FILE, FETCH_TIER_RECHECK
+from statestore import state_store
+
+logger = logging.getLogger(__name__)
+
+# Уровни загрузки HTML от самого дешёвого к самому дорогому
+FETCH_TIERS = ['httpx', 'cloudscraper', 'playwright']
+
+
+class FetchStrategyMemory:
+    """Запоминает, какой способ загрузки последним сработал для каждого HTML-источника"""
+
+    def __init__(self, legacy_path: str):
+        self.records: Dict[str, Dict] = state_store.load('fetch_strategy', legacy_path)
+
+    def plan(self, source) -> List[str]:
+        """Порядок уровней для источника: сначала тот, что сработал в прошлый раз"""
+        tiers = source.tiers
+        record = self.records.get(source.name)
+        if not record or record['tier'] not in tiers:
+            return list(tiers)
+        # Время от времени проверяем, не заработали ли снова дешёвые уровни
+        if FETCH_TIER_RECHECK and record['uses'] % FETCH_TIER_RECHECK == 0:
+            return list(tiers)
+        return [record['tier']] + [tier for tier in tiers if tier != record['tier']]
+
+    def record(self, name: str, tier: str, latency: float):
+        record = self.records.get(name)
+        if record and record['tier'] == tier:
+            record['uses'] += 1
+            record['latency'] = round(latency, 2)
+        else:
+            if record:
+                logger.info(f"🧭 {name}: способ загрузки {record['tier']} → {tier}")
+            # Начинаем с 1, чтобы перепроверка шла не сразу после смены уровня
+            self.records[name] = {'tier': tier, 'latency': round(latency, 2), 'uses': 1}
+
+    def save(self):
+        state_store.put('fetch_strategy', self.records)
+
+
+fetch_strategies = FetchStrategyMemory(FETCH_STRATEGY_FILE)
@@ -0,0 +1,20 @@
+import re
+from html import unescape
+
+# Комментарии, содержимое script/style и сами теги; одиночный «<» в тексте тегом не считается
+_MARKUP_RE = re.compile(
+    r'<!--.*?-->|<(script|style)\b.*?</\1\s*>|</?[a-zA-Z][^>]*>|<![^>]*>|<\?[^>]*>',
+    re.DOTALL | re.IGNORECASE,
+)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def html_to_text(markup: str) -> str:
+    """Извлекает текст из HTML-фрагмента: теги заменяются пробелами, сущности раскодируются"""
+    if not markup:
+        return ''
+    if '<' in markup:
+        markup = _MARKUP_RE.sub(' ', markup)
+    if '&' in markup:
+        markup = unescape(markup)
+    return _SPACES_RE.sub(' ', markup).strip()
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import (
+    TRANSLATION_BACKEND,
+    TRANSLATION_TIMEOUT,
+    TRANSLATION_CONCURRENCY,
+    TRANSLATION_OFFLINE_LATENCY,
+)
+from backends import backend
+from langid import detect_language
+from replay import replay_archive
+from statestore import state_store
+
+logger = logging.getLogger(__name__)
+
+TARGET_LANG = 'ru'
+# Ограничение длины одного запроса к Google Translate
+GOOGLE_MAX_CHARS = 4500
+
+
+class TranslationBackend(ABC):
+    """Движок перевода: переводит пачку текстов одного языка"""
+
+    name = ''
+    # Результаты сохраняются в кэш переводов между перезапусками
+    cacheable = False
+
+    @abstractmethod
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        """Переводы в том же порядке, что и texts"""
+
+    def shutdown(self):
+        pass
+
+
+class GoogleBackend(TranslationBackend):
+    """deep_translator.GoogleTranslator в пуле потоков: сетевые запросы не блокируют цикл событий"""
+
+    name = 'google'
+    cacheable = True
+
+    def __init__(self, workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='translate')
+
+    @staticmethod
+    def _translate(text: str, source: str, target: str) -> str:
+        translator = backend('deep_translator').GoogleTranslator(source=source, target=target)
+        return translator.translate(text[:GOOGLE_MAX_CHARS]) or text
+
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self._translate, text, source, target) for text in texts
+        )))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class OfflineBackend(TranslationBackend):
+    """Локальная заглушка без сети: возвращает текст как есть с заданной задержкой (для тестов и нагрузки)"""
+
+    name = 'offline'
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return list(texts)
+
+
+class ReplayBackend(TranslationBackend):
+    """Переводы из архива записи; отсутствующие тексты остаются без перевода"""
+
+    name = 'replay'
+
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        return [replay_archive.load_translation(text, source) for text in texts]
+
+
+TRANSLATION_BACKENDS = ('google', 'offline', 'replay')
+
+
+def create_backend(name: str) -> TranslationBackend:
+    if name == 'google':
+        return GoogleBackend(TRANSLATION_CONCURRENCY)
+    if name == 'offline':
+        return OfflineBackend(TRANSLATION_OFFLINE_LATENCY)
+    if name == 'replay':
+        return ReplayBackend()
+    raise ValueError(f"Неизвестный движок перевода: {name} (доступны: {', '.join(TRANSLATION_BACKENDS)})")
+
+
+class Translator:
+    """Перевод на русский с ограничением времени и числа одновременных запросов"""
+
+    def __init__(self, engine: TranslationBackend, timeout: float, concurrency: int):
+        self.engine = engine
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Семафор привязан к циклу событий, поэтому пересоздаём его при смене цикла
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def translate(self, texts: List[str], lang: Optional[str] = None) -> List[str]:
+        """Переводит тексты одной записи; lang можно передать, если язык уже определён"""
+        if lang is None:
+            lang = detect_language(' '.join(texts))
+        if lang == TARGET_LANG or lang == 'unknown':
+            return list(texts)
+
+        pending = [text for text in texts if text and text.strip()]
+        if not pending:
+            return list(texts)
+
+        done: Dict[str, str] = {}
+        if self.engine.cacheable:
+            keys = {text: self._cache_key(text, lang) for text in pending}
+            cached = await state_store.get_translations(list(keys.values()))
+            for text, key in keys.items():
+                if key in cached:
+                    done[text] = cached[key]
+                    # Обновляем время использования, чтобы перевод не вытеснялся из кэша
+                    state_store.add_translation(key, cached[key])
+                    if replay_archive.recording:
+                        replay_archive.save_translation(text, lang, cached[key])
+            pending = [text for text in pending if text not in done]
+
+        if pending:
+            translated = await self._translate_pending(pending, lang)
+            if translated is None:
+                return [done.get(text, text) for text in texts]
+            for text, result in zip(pending, translated):
+                done[text] = result
+                if self.engine.cacheable:
+                    state_store.add_translation(self._cache_key(text, lang), result)
+                if replay_archive.recording:
+                    replay_archive.save_translation(text, lang, result)
+        return [done.get(text, text) for text in texts]
+
+    @staticmethod
+    def _cache_key(text: str, lang: str) -> str:
+        return hashlib.sha1(f"{lang}|{text}".encode('utf-8')).hexdigest()
+
+    async def _translate_pending(self, pending: List[str], lang: str) -> Optional[List[str]]:
+        try:
+            async with self._get_semaphore():
+                translated = await asyncio.wait_for(
+                    self.engine.translate_batch(pending, lang, TARGET_LANG), self.timeout
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱ Перевод ({self.engine.name}) не уложился в {self.timeout:.0f}с, оставляем оригинал")
+            return None
+        except Exception as e:
+            logger.warning(f"Ошибка перевода текста: {e}")
+            return None
+        return translated
+
+    def shutdown(self):
+        self.engine.shutdown()
+
+
+translator = Translator(
+    create_backend('replay' if replay_archive.replaying else TRANSLATION_BACKEND),
+    TRANSLATION_TIMEOUT,
+    TRANSLATION_CONCURRENCY,
+)
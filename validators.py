@@ -0,0 +1,33 @@
+from typing import Dict
+
+from statestore import state_store
+
+
+class HttpValidators:
+    """ETag и Last-Modified лент для условных запросов: неизменившаяся лента отвечает 304 без тела"""
+
+    def __init__(self):
+        self.validators: Dict[str, Dict] = state_store.load('validators')
+
+    def headers(self, name: str) -> Dict[str, str]:
+        saved = self.validators.get(name, {})
+        headers = {}
+        if saved.get('etag'):
+            headers['If-None-Match'] = saved['etag']
+        if saved.get('last_modified'):
+            headers['If-Modified-Since'] = saved['last_modified']
+        return headers
+
+    def update(self, name: str, response_headers):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if etag or last_modified:
+            self.validators[name] = {'etag': etag, 'last_modified': last_modified}
+        else:
+            self.validators.pop(name, None)
+
+    def save(self):
+        state_store.put('validators', self.validators)
+
+
+http_validators = HttpValidators()